@@ -0,0 +1,230 @@
+"""Convert dispatcher configs to APISIX routes and upstreams.
+
+Each service becomes one route on ``<prefix>`` and ``<prefix>/*`` (the
+dispatcher matches whole path segments, so the bare prefix is served too)
+with a traffic-split plugin:
+
+* every rule becomes a traffic-split rule, in order; each of its matches is
+  one ``match`` entry (entries are OR-ed, like matches of a rule) testing
+  the header variable, e.g. ``["http_x_tool_id", "==", "tool123"]``, with
+  ``~=`` mapped to the regex operator ``~~``;
+* rollstrategy groups become a final catch-all rule with weighted upstreams;
+* the route's own upstream is the service's default upstream.
+
+Upstreams with identical nodes are emitted once and shared by every route
+that uses them; their ids are derived from the node hash so they are stable
+across exports. Objects are produced by generators and written one at a
+time, so exporting a huge config does not build the whole output in memory.
+
+    python apisix_converter.py --config config/input.yaml --output apisix.yaml
+    python apisix_converter.py --config config/input.yaml --previous apisix.yaml --output delta.yaml
+"""
+import argparse
+import hashlib
+import json
+import re
+import sys
+
+import yaml
+
+from config_loader import DEFAULT_CONFIG_FILE, load_and_validate_config
+from perf_metrics import timed
+
+# Variable operators of lua-resty-expr used by traffic-split.
+OPERATORS = {"==": "==", "~=": "~~"}
+
+# libyaml's emitter is much faster when dumping many small documents.
+Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# Characters allowed in APISIX object ids, and their maximum length.
+_ID_INVALID = re.compile(r"[^a-zA-Z0-9_.-]")
+MAX_ID_LENGTH = 64
+
+
+def header_var(header_name):
+    """Return the nginx variable of a request header (X-Tool-Id -> http_x_tool_id)."""
+    return "http_" + str(header_name).lower().replace("-", "_")
+
+
+def route_id(service_name, hashed=False):
+    """Return a stable, valid APISIX route id for a service.
+
+    With ``hashed`` (or when the id would be too long) a hash of the exact
+    name is appended, which tells apart names that sanitize alike ("a b",
+    "A-B").
+    """
+    ident = _ID_INVALID.sub("-", str(service_name)).lower()
+    if hashed or len(ident) > MAX_ID_LENGTH:
+        digest = hashlib.sha1(str(service_name).encode("utf-8")).hexdigest()[:12]
+        ident = f"{ident[:MAX_ID_LENGTH - 13]}-{digest}"
+    return ident
+
+
+def route_uris(uri):
+    """Return the APISIX uris of a service prefix: the prefix itself and everything below it."""
+    prefix = uri.rstrip("/")
+    return [prefix or "/", prefix + "/*"]
+
+
+def _content_hash(obj):
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")).hexdigest()
+
+
+def upstream_object(upstream):
+    """Return the APISIX upstream for a service upstream; the id is the hash of its nodes."""
+    body = {"type": "roundrobin", "nodes": {f"{upstream['target']}:{upstream['port']}": 1}}
+    return {"id": f"ups-{_content_hash(body)[:16]}", **body}
+
+
+def route_object(service, upstream_ids):
+    """Return the APISIX route for a service; upstream_ids maps its upstream ids to APISIX ids."""
+    matches = {match["id"]: match for match in service.get("matches") or []}
+    rules = []
+    for rule in service.get("rules") or []:
+        match = [
+            {"vars": [[header_var(matches[match_id]["header_name"]), OPERATORS[matches[match_id]["operator"]], str(matches[match_id]["value"])]]}
+            for match_id in rule.get("matches") or [] if match_id in matches
+        ]
+        if match:
+            rules.append({"match": match, "weighted_upstreams": [{"upstream_id": upstream_ids[rule["upstream_id"]], "weight": 1}]})
+
+    groups = (service.get("rollstrategy") or {}).get("groups")
+    if groups:
+        rules.append({"weighted_upstreams": [{"upstream_id": upstream_ids[group["upstream_id"]], "weight": group["weight"]} for group in groups]})
+
+    route = {
+        "id": route_id(service["name"]),
+        "name": service["name"],
+        "uris": route_uris(service["uri"]),
+        "upstream_id": upstream_ids[service["default_upstream"]],
+        "status": 0 if service.get("admin_state", "enabled") == "disabled" else 1,
+    }
+    if rules:
+        route["plugins"] = {"traffic-split": {"rules": rules}}
+    return route
+
+
+def iter_upstreams(config):
+    """Yield every distinct APISIX upstream of a config once, in first-use order."""
+    seen = set()
+    for service in config.get("services", []):
+        for upstream in service.get("upstreams") or []:
+            obj = upstream_object(upstream)
+            if obj["id"] not in seen:
+                seen.add(obj["id"])
+                yield obj
+
+
+def iter_routes(config):
+    """Yield the APISIX route of every service.
+
+    A service whose id is already taken by an earlier one gets the hashed id.
+    """
+    seen = set()
+    for service in config.get("services", []):
+        upstream_ids = {upstream["id"]: upstream_object(upstream)["id"] for upstream in service.get("upstreams") or []}
+        route = route_object(service, upstream_ids)
+        if route["id"] in seen:
+            route["id"] = route_id(service["name"], hashed=True)
+        seen.add(route["id"])
+        yield route
+
+
+def iter_apisix_objects(config):
+    """Yield ("upstreams", obj) for all upstreams, then ("routes", obj) for all routes."""
+    for obj in iter_upstreams(config):
+        yield "upstreams", obj
+    for obj in iter_routes(config):
+        yield "routes", obj
+
+
+@timed("convert_to_apisix_config")
+def convert_to_apisix_config(config):
+    """Convert the custom input.yaml configuration to APISIX traffic-split config."""
+    return {"routes": list(iter_routes(config)), "upstreams": list(iter_upstreams(config))}
+
+
+def object_hashes(apisix_config):
+    """Return {(kind, id): content hash} for the routes and upstreams of an export."""
+    return {
+        (kind, obj["id"]): _content_hash(obj)
+        for kind in ("upstreams", "routes")
+        for obj in (apisix_config or {}).get(kind) or []
+    }
+
+
+def iter_delta(config, previous_hashes):
+    """Yield the changes since a previous export as ("put", kind, obj) and ("delete", kind, id).
+
+    Puts come first (upstreams before routes), then deleted routes before
+    deleted upstreams, so no route ever references a missing upstream.
+    """
+    current = set()
+    for kind, obj in iter_apisix_objects(config):
+        current.add((kind, obj["id"]))
+        if previous_hashes.get((kind, obj["id"])) != _content_hash(obj):
+            yield "put", kind, obj
+    for kind in ("routes", "upstreams"):
+        for previous_kind, ident in previous_hashes:
+            if previous_kind == kind and (kind, ident) not in current:
+                yield "delete", kind, ident
+
+
+def _dump_item(obj):
+    text = yaml.dump([obj], Dumper=Dumper, default_flow_style=False, sort_keys=False, allow_unicode=True)
+    return "  " + text.rstrip("\n").replace("\n", "\n  ") + "\n"
+
+
+@timed("write_apisix_config")
+def write_apisix_config(config, stream, previous_hashes=None):
+    """Stream an APISIX standalone (apisix.yaml) export to a text stream.
+
+    With ``previous_hashes`` (see object_hashes) only new and changed objects
+    are written, and removed ones are listed under ``deleted``.
+    """
+    if previous_hashes is None:
+        changes = (("put", kind, obj) for kind, obj in iter_apisix_objects(config))
+    else:
+        changes = iter_delta(config, previous_hashes)
+    section = None
+    deleted = {}
+    counts = {"upstreams": 0, "routes": 0}
+    for action, kind, obj in changes:
+        if action == "delete":
+            deleted.setdefault(kind, []).append(obj)
+            continue
+        if kind != section:
+            stream.write(f"{kind}:\n")
+            section = kind
+        stream.write(_dump_item(obj))
+        counts[kind] += 1
+    if deleted:
+        stream.write(yaml.dump({"deleted": deleted}, Dumper=Dumper, default_flow_style=False, sort_keys=False))
+    stream.write("#END\n")
+    return counts, deleted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a dispatcher config as APISIX routes and upstreams.")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_FILE, help="Configuration file or split config directory")
+    parser.add_argument("--output", default=None, help="Write the export here (default: stdout)")
+    parser.add_argument("--previous", default=None, help="Earlier full export; only write what changed since then")
+    args = parser.parse_args(argv)
+
+    config = load_and_validate_config(args.config)
+    previous_hashes = None
+    if args.previous:
+        with open(args.previous, "rb") as f:
+            previous_hashes = object_hashes(yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            counts, deleted = write_apisix_config(config, f, previous_hashes)
+    else:
+        counts, deleted = write_apisix_config(config, sys.stdout, previous_hashes)
+    removed = sum(len(ids) for ids in deleted.values())
+    print(f"{counts['routes']} routes, {counts['upstreams']} upstreams written, {removed} deleted", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
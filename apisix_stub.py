@@ -0,0 +1,180 @@
+"""Local stand-in for the APISIX Admin API, for trying apisix_sync without a gateway.
+
+    python apisix_stub.py --port 9180
+    python apisix_sync.py --admin-url http://127.0.0.1:9180 --prune
+
+Keeps routes and upstreams in memory and answers the Admin API 3.x calls
+apisix_sync uses (list, PUT, DELETE) over keep-alive HTTP/1.1. Like APISIX
+it rejects routes that reference a missing upstream and refuses to delete
+an upstream that is still in use, so ordering mistakes surface here.
+``--fail-rate`` answers a share of requests with 503 to exercise retries.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from apisix_sync import ADMIN_PREFIX
+
+KINDS = ("routes", "upstreams")
+
+
+def _route_upstreams(route):
+    """Return the upstream ids a route refers to, including traffic-split ones."""
+    ids = {route.get("upstream_id")}
+    for rule in ((route.get("plugins") or {}).get("traffic-split") or {}).get("rules") or []:
+        ids.update(weighted.get("upstream_id") for weighted in rule.get("weighted_upstreams") or [])
+    ids.discard(None)
+    return ids
+
+
+class AdminStore:
+    """Thread-safe in-memory routes and upstreams, with APISIX's reference checks."""
+
+    def __init__(self):
+        self.objects = {kind: {} for kind in KINDS}
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def list(self, kind):
+        with self._lock:
+            items = [{"key": f"/apisix/{kind}/{ident}", "value": value} for ident, value in self.objects[kind].items()]
+        return 200, {"total": len(items), "list": items}
+
+    def get(self, kind, ident):
+        with self._lock:
+            value = self.objects[kind].get(ident)
+        if value is None:
+            return 404, {"message": "Key not found"}
+        return 200, {"key": f"/apisix/{kind}/{ident}", "value": value}
+
+    def put(self, kind, ident, value):
+        if not isinstance(value, dict):
+            return 400, {"error_msg": "invalid configuration: object expected"}
+        with self._lock:
+            if kind == "routes":
+                missing = sorted(_route_upstreams(value) - self.objects["upstreams"].keys())
+                if missing:
+                    return 400, {"error_msg": f"failed to fetch upstream info by upstream id [{missing[0]}]"}
+            now = int(time.time())
+            previous = self.objects[kind].get(ident)
+            stored = {**value, "id": ident, "create_time": previous["create_time"] if previous else now, "update_time": now}
+            self.objects[kind][ident] = stored
+        return (200 if previous else 201), {"key": f"/apisix/{kind}/{ident}", "value": stored}
+
+    def delete(self, kind, ident):
+        with self._lock:
+            if ident not in self.objects[kind]:
+                return 404, {"message": "Key not found"}
+            if kind == "upstreams":
+                users = [route_id for route_id, route in self.objects["routes"].items() if ident in _route_upstreams(route)]
+                if users:
+                    return 400, {"error_msg": f"can not delete this upstream, route [{users[0]}] is still using it now"}
+            del self.objects[kind][ident]
+        return 200, {"deleted": "1", "key": f"/apisix/{kind}/{ident}"}
+
+
+class AdminHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real Admin API
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _dispatch(self, method):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        with server.store._lock:
+            server.store.requests += 1
+        if server.api_key and self.headers.get("X-API-KEY") != server.api_key:
+            return self._send(401, {"message": "Missing API key found in request"})
+        if server.fail_rate and random.random() < server.fail_rate:
+            return self._send(503, {"error_msg": "injected failure"})
+
+        parts = self.path.split("?", 1)[0][len(ADMIN_PREFIX):].strip("/").split("/")
+        if not self.path.startswith(ADMIN_PREFIX) or parts[0] not in KINDS or len(parts) > 2:
+            return self._send(404, {"error_msg": "404 Route Not Found"})
+        kind, ident = parts[0], parts[1] if len(parts) == 2 else None
+
+        if method == "GET":
+            return self._send(*(server.store.get(kind, ident) if ident else server.store.list(kind)))
+        if ident is None:
+            return self._send(405, {"error_msg": "id required"})
+        if method == "PUT":
+            try:
+                value = json.loads(body or b"null")
+            except ValueError:
+                return self._send(400, {"error_msg": "invalid request body"})
+            return self._send(*server.store.put(kind, ident, value))
+        return self._send(*server.store.delete(kind, ident))
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+
+class AdminStub:
+    """Admin API stub server running in a background thread."""
+
+    def __init__(self, host="127.0.0.1", port=0, api_key=None, fail_rate=0.0):
+        self.server = ThreadingHTTPServer((host, port), AdminHandler)
+        self.server.daemon_threads = True
+        self.server.store = AdminStore()
+        self.server.api_key = api_key
+        self.server.fail_rate = fail_rate
+        self._thread = None
+
+    @property
+    def store(self):
+        return self.server.store
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="apisix-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run an in-memory stand-in for the APISIX Admin API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9180)
+    parser.add_argument("--api-key", default=None, help="Require this X-API-KEY")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    args = parser.parse_args(argv)
+
+    stub = AdminStub(args.host, args.port, args.api_key, args.fail_rate)
+    print(f"APISIX Admin API stub listening on {stub.url}{ADMIN_PREFIX}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Push the APISIX export of a dispatcher config to an APISIX Admin API.
+
+    python apisix_sync.py --config config/input.yaml --admin-url http://127.0.0.1:9180 --api-key $KEY
+
+The current routes and upstreams are read once; only objects that differ
+from the export are PUT, and (with ``--prune``) objects this tool created
+earlier but no longer exports are DELETEd. Operations run concurrently over
+a pool of keep-alive connections, in dependency order: upstream PUTs, route
+PUTs, route DELETEs, upstream DELETEs. A phase that fails stops the sync
+before the next phase starts, so no route ever points at a missing upstream.
+"""
+import argparse
+import http.client
+import json
+import os
+import queue
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from apisix_converter import iter_apisix_objects
+from config_loader import DEFAULT_CONFIG_FILE, load_and_validate_config
+from perf_metrics import timed
+
+ADMIN_PREFIX = "/apisix/admin"
+
+# Objects written by this tool carry this label; only they are ever pruned.
+MANAGED_LABEL = ("managed-by", "dispatcher")
+
+# Fields the Admin API adds to stored objects; ignored when comparing.
+SERVER_FIELDS = ("create_time", "update_time")
+
+# Fields the export controls per kind. One of them set on the gateway but
+# absent from the export (e.g. the plugins of a route that lost its rules)
+# is stale, and the object is written again to drop it. Routes keep owning
+# "uri", which earlier exports used instead of "uris".
+OWNED_FIELDS = {
+    "routes": ("name", "uri", "uris", "upstream_id", "status", "plugins", "labels"),
+    "upstreams": ("type", "nodes", "labels"),
+}
+
+# Status codes worth retrying.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# One planned Admin API call. `value` is the object to PUT, None for DELETE.
+Operation = namedtuple("Operation", ["method", "kind", "id", "value"])
+
+# Outcome of a sync: {"PUT routes": n, ...}, [(Operation, error)], operations not attempted.
+SyncResult = namedtuple("SyncResult", ["applied", "failed", "skipped"])
+
+
+class AdminAPIError(Exception):
+    """Raised when the Admin API rejects a request or cannot be reached."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class AdminClient:
+    """Minimal APISIX Admin API client with a pool of keep-alive connections."""
+
+    def __init__(self, base_url, api_key=None, pool_size=8, timeout=10, retries=3, backoff=0.2):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/") + ADMIN_PREFIX
+        self.api_key = api_key
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def _release(self, conn):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def request(self, method, path, body=None):
+        """Send one request, retrying connection errors and retryable statuses. Returns the decoded JSON body."""
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["X-API-KEY"] = self.api_key
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+
+        for attempt in range(self.retries + 1):
+            conn = self._acquire()
+            try:
+                conn.request(method, self.prefix + path, body=payload, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError) as e:
+                # Stale keep-alive connections end up here too; never reuse them.
+                conn.close()
+                if attempt == self.retries:
+                    raise AdminAPIError(f"{method} {path} failed: {e}")
+            else:
+                if response.will_close:
+                    conn.close()
+                else:
+                    self._release(conn)
+                if response.status < 400:
+                    return json.loads(data) if data else None
+                if response.status not in RETRY_STATUSES or attempt == self.retries:
+                    raise AdminAPIError(f"{method} {path} returned {response.status}: {data.decode('utf-8', 'replace')[:500]}", response.status)
+            time.sleep(self.backoff * (2 ** attempt))
+
+    def list(self, kind):
+        """Return {id: value} of every object of a kind ("routes" or "upstreams")."""
+        data = self.request("GET", f"/{kind}") or {}
+        if "list" in data:  # APISIX 3.x
+            items = data["list"]
+        else:  # APISIX 2.x
+            items = (data.get("node") or {}).get("nodes") or []
+        objects = {}
+        for item in items if isinstance(items, list) else []:
+            value = item.get("value") or {}
+            ident = value.get("id") or item.get("key", "").rsplit("/", 1)[-1]
+            objects[str(ident)] = value
+        return objects
+
+    def put(self, kind, ident, value):
+        return self.request("PUT", f"/{kind}/{ident}", value)
+
+    def delete(self, kind, ident):
+        return self.request("DELETE", f"/{kind}/{ident}")
+
+
+def _managed(obj):
+    return {**obj, "labels": {**(obj.get("labels") or {}), MANAGED_LABEL[0]: MANAGED_LABEL[1]}}
+
+
+def _is_managed(value):
+    return (value.get("labels") or {}).get(MANAGED_LABEL[0]) == MANAGED_LABEL[1]
+
+
+def _differs(kind, desired, current):
+    # The gateway fills in defaults (scheme, pass_host, ...), so only the
+    # fields we set or own decide whether an object needs to be written again.
+    if current is None:
+        return True
+    fields = (desired.keys() | set(OWNED_FIELDS.get(kind, ()))) - set(SERVER_FIELDS)
+    return any(current.get(field) != desired.get(field) for field in fields)
+
+
+def plan_sync(objects, current, prune=False):
+    """Return the phases of Operations turning current into the desired objects.
+
+    ``objects`` yields (kind, obj) pairs in dependency order (as from
+    iter_apisix_objects); ``current`` maps kind -> {id: value}.
+    """
+    puts = {"upstreams": [], "routes": []}
+    desired = {"upstreams": set(), "routes": set()}
+    for kind, obj in objects:
+        obj = _managed(obj)
+        desired[kind].add(obj["id"])
+        if _differs(kind, obj, current.get(kind, {}).get(obj["id"])):
+            puts[kind].append(Operation("PUT", kind, obj["id"], {field: value for field, value in obj.items() if field != "id"}))
+
+    deletes = {"upstreams": [], "routes": []}
+    if prune:
+        for kind in deletes:
+            for ident, value in current.get(kind, {}).items():
+                if ident not in desired[kind] and _is_managed(value):
+                    deletes[kind].append(Operation("DELETE", kind, ident, None))
+    return [puts["upstreams"], puts["routes"], deletes["routes"], deletes["upstreams"]]
+
+
+def apply_plan(client, phases, concurrency=8):
+    """Run the phases in order, the operations of each phase concurrently."""
+    applied = {}
+    failed = []
+    skipped = 0
+
+    def run(operation):
+        if operation.method == "PUT":
+            client.put(operation.kind, operation.id, operation.value)
+        else:
+            client.delete(operation.kind, operation.id)
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        for phase in phases:
+            if failed:
+                skipped += len(phase)
+                continue
+            futures = [(operation, pool.submit(run, operation)) for operation in phase]
+            for operation, future in futures:
+                try:
+                    future.result()
+                except AdminAPIError as e:
+                    failed.append((operation, str(e)))
+                else:
+                    key = f"{operation.method} {operation.kind}"
+                    applied[key] = applied.get(key, 0) + 1
+    return SyncResult(applied, failed, skipped)
+
+
+@timed("apisix_sync")
+def sync_config(config, client, prune=False, concurrency=8, dry_run=False):
+    """Bring the Admin API in line with the APISIX export of config. Returns (phases, SyncResult or None)."""
+    current = {kind: client.list(kind) for kind in ("upstreams", "routes")}
+    phases = plan_sync(iter_apisix_objects(config), current, prune)
+    if dry_run:
+        return phases, None
+    return phases, apply_plan(client, phases, concurrency)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync the APISIX export of a dispatcher config to the Admin API.")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_FILE, help="Configuration file or split config directory")
+    parser.add_argument("--admin-url", default=os.environ.get("APISIX_ADMIN_URL", "http://127.0.0.1:9180"), help="Admin API base URL")
+    parser.add_argument("--api-key", default=os.environ.get("APISIX_ADMIN_KEY"), help="Admin API key (default: $APISIX_ADMIN_KEY)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel requests (and pooled connections)")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per request on connection errors and 429/5xx")
+    parser.add_argument("--prune", action="store_true", help="Delete routes and upstreams created by this tool that are no longer exported")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the planned operations")
+    args = parser.parse_args(argv)
+
+    config = load_and_validate_config(args.config)
+    client = AdminClient(args.admin_url, args.api_key, pool_size=args.concurrency, retries=args.retries)
+    try:
+        phases, result = sync_config(config, client, prune=args.prune, concurrency=args.concurrency, dry_run=args.dry_run)
+    except AdminAPIError as e:
+        print(f"Sync failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        client.close()
+
+    if result is None:
+        for operation in (operation for phase in phases for operation in phase):
+            print(f"{operation.method} {operation.kind}/{operation.id}")
+        return 0
+    for operation, error in result.failed:
+        print(f"FAILED {operation.method} {operation.kind}/{operation.id}: {error}", file=sys.stderr)
+    summary = ", ".join(f"{count} {key}" for key, count in sorted(result.applied.items())) or "nothing to do"
+    print(f"Applied: {summary}" + (f"; {result.skipped} skipped after failures" if result.skipped else ""), file=sys.stderr)
+    return 1 if result.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
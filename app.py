@@ -1,5 +1,20 @@
 import streamlit as st # type: ignore
-from config_loader import load_and_validate_config, ConfigValidationError
+from config_watcher import INVALID, STALE, VALID, start_watcher
+from perf_metrics import METRICS_FILE, registry
+
+STATUS_BADGES = {VALID: "🟢 valid", INVALID: "🔴 invalid", STALE: "🟡 stale"}
+
+def render_config_status():
+    """Show the watcher's latest validation status of every config source in the sidebar."""
+    watcher = start_watcher()
+    with st.sidebar:
+        st.subheader("Config status")
+        statuses = watcher.store.all()
+        if not statuses:
+            st.caption("No configuration files found.")
+        for source, status in statuses.items():
+            detail = f" ({status.errors} errors)" if status.errors else ""
+            st.markdown(f"`{source}` {STATUS_BADGES[status.state]}{detail}")
 
 
 pages = {
@@ -15,8 +30,13 @@ pages = {
     "Troubleshoot": [
         st.Page("validate_config.py", title="Validate Configuration YAML"),
         st.Page("diff_config.py", title="Diff Configuration YAML"),
+        st.Page("view_performance.py", title="Performance"),
     ]
 }
 
 pg = st.navigation(pages)
-pg.run()
+render_config_status()
+with registry.timed("page_render", page=pg.title):
+    pg.run()
+if METRICS_FILE:
+    registry.write_prometheus(METRICS_FILE)
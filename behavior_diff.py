@@ -0,0 +1,193 @@
+"""Replay a request log through two configs and report which requests change upstream.
+
+    python behavior_diff.py requests.jsonl --old config/input.yaml --new "config/input copy.yaml"
+
+Both routing tables see every request in one streaming pass. Requests
+without a sticky key draw one random rollstrategy bucket that is used for
+both versions, so only real routing changes show up as moves.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from collections import Counter
+
+from config_loader import load_and_validate_config
+from config_validator import service_digest
+from replay import DEFAULT_CHUNK_SIZE, iter_chunks, map_chunks, parse_record
+from rollout import BUCKETS, DEFAULT_STICKY_HEADER, sticky_bucket
+from routing import compile_config
+
+# Example requests kept per distinct move.
+SAMPLES_PER_MOVE = 3
+
+# (old table, new table, names of services identical in both) of the current worker.
+_tables = None
+
+
+def compile_pair(old_config, new_config, sticky_header=DEFAULT_STICKY_HEADER):
+    """Compile both configs and return (old table, new table, identical service names).
+
+    The new table is compiled against the old one, exactly as a reload
+    would, so sticky keys only move where the rollstrategy really changed.
+    """
+    old_table = compile_config(old_config, sticky_header)
+    new_table = compile_config(new_config, sticky_header, previous=old_table)
+    old_services = {s["name"]: s for s in old_config.get("services", []) if s["name"] in old_table.services}
+    identical = frozenset(
+        service["name"] for service in new_config.get("services", [])
+        if service["name"] in new_table.services and service["name"] in old_services
+        and service_digest(service) == service_digest(old_services[service["name"]])
+    )
+    return old_table, new_table, identical
+
+
+def _init_worker(old_path, new_path, sticky_header):
+    global _tables
+    _tables = compile_pair(load_and_validate_config(old_path), load_and_validate_config(new_path), sticky_header)
+
+
+def diff_chunk(lines, tables=None):
+    """Route a chunk of raw JSONL lines through both tables.
+
+    Returns (requests per old service, move counts, move samples, counters).
+    A request moves when its upstream differs between the versions; the move
+    key is (old decision, new decision), a decision being None when that
+    version does not route the request at all. Requests that keep their
+    upstream but hit another rule or group are only counted.
+    """
+    old_table, new_table, identical = tables or _tables
+    requests = Counter()
+    moves = Counter()
+    samples = {}
+    counters = Counter()
+    for line in lines:
+        request = parse_record(line)
+        if request is None:
+            if line.strip():
+                counters["invalid"] += 1
+            continue
+        uri, headers = request
+        old_service = old_table.find_service(uri)
+        new_service = new_table.find_service(uri)
+        old_name = old_service.name if old_service is not None else None
+        requests[old_name] += 1
+        if old_service is None and new_service is None:
+            counters["unrouted"] += 1
+            continue
+
+        # Fast path: same service on both sides with identical definitions.
+        if old_name is not None and new_service is not None and new_service.name == old_name and old_name in identical:
+            counters["skipped_identical"] += 1
+            continue
+        counters["compared"] += 1
+
+        headers = {str(name).lower(): str(value) for name, value in headers.items()}
+        sticky_header = (old_service or new_service).sticky_header
+        key = headers.get(sticky_header) if sticky_header else None
+        bucket = sticky_bucket(key) if key is not None else random.randrange(BUCKETS)
+        old = old_service.route(headers, bucket) if old_service is not None else None
+        new = new_service.route(headers, bucket) if new_service is not None else None
+        if (old.upstream if old is not None else None) == (new.upstream if new is not None else None):
+            if old != new:
+                counters["decision_changed"] += 1
+            continue
+        move = (old, new)
+        moves[move] += 1
+        kept = samples.setdefault(move, [])
+        if len(kept) < SAMPLES_PER_MOVE:
+            kept.append({"uri": uri, "headers": headers})
+    return requests, moves, samples, counters
+
+
+def _describe(decision):
+    if decision is None:
+        return {"service": None, "rule": None, "upstream": None, "group": None}
+    return {"service": decision.service, "rule": decision.rule or "(default)", "upstream": decision.upstream, "group": decision.group}
+
+
+class BehaviorDiffResult:
+    """Aggregated routing changes between two configs over a request log."""
+
+    def __init__(self):
+        self.requests = Counter()
+        self.moves = Counter()
+        self.samples = {}
+        self.counters = Counter()
+
+    def add(self, chunk_result):
+        requests, moves, samples, counters = chunk_result
+        self.requests.update(requests)
+        self.moves.update(moves)
+        self.counters.update(counters)
+        for move, kept in samples.items():
+            self.samples.setdefault(move, []).extend(kept[:SAMPLES_PER_MOVE - len(self.samples.get(move, ()))])
+
+    def summary(self):
+        """Return totals plus moved requests per service and rule, largest moves first."""
+        services = {}
+        for (old, new), count in self.moves.most_common():
+            name = old.service if old is not None else "(unrouted)"
+            stats = services.get(name)
+            if stats is None:
+                stats = services[name] = {"requests": self.requests.get(old.service if old is not None else None, 0), "moved": 0, "upstreams": Counter(), "rules": {}, "moves": []}
+            stats["moved"] += count
+            from_, to = _describe(old), _describe(new)
+            stats["upstreams"][f"{from_['upstream']} -> {to['upstream']}"] += count
+            rule = stats["rules"].setdefault(from_["rule"] or "(unrouted)", {"moved": 0, "upstreams": Counter()})
+            rule["moved"] += count
+            rule["upstreams"][f"{from_['upstream']} -> {to['upstream']}"] += count
+            stats["moves"].append({"from": from_, "to": to, "count": count, "samples": self.samples.get((old, new), [])})
+
+        for stats in services.values():
+            stats["upstreams"] = dict(stats["upstreams"])
+            for rule in stats["rules"].values():
+                rule["upstreams"] = dict(rule["upstreams"])
+
+        routed = sum(self.requests.values())
+        return {
+            "requests": routed + self.counters["invalid"],
+            "invalid": self.counters["invalid"],
+            "compared": self.counters["compared"],
+            "skipped_identical": self.counters["skipped_identical"],
+            "unrouted": self.counters["unrouted"],
+            "moved": sum(self.moves.values()),
+            "rule_or_group_changed": self.counters["decision_changed"],
+            "services": services,
+        }
+
+
+def behavior_diff(log_path: str, old_path: str, new_path: str, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, sticky_header=DEFAULT_STICKY_HEADER):
+    """Stream a JSONL request log through the routing tables of two configs."""
+    tables = compile_pair(load_and_validate_config(old_path), load_and_validate_config(new_path), sticky_header)
+    result = BehaviorDiffResult()
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        for chunk in iter_chunks(log_path, chunk_size):
+            result.add(diff_chunk(chunk, tables))
+        return result
+
+    for chunk_result in map_chunks(log_path, diff_chunk, workers, chunk_size, _init_worker, (old_path, new_path, sticky_header)):
+        result.add(chunk_result)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report which logged requests change upstream between two configs.")
+    parser.add_argument("log", help="JSONL file with one {\"uri\", \"headers\"} record per line")
+    parser.add_argument("--old", required=True, help="Current configuration file or split config directory")
+    parser.add_argument("--new", required=True, help="Proposed configuration file or split config directory")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Records per chunk sent to a worker")
+    parser.add_argument("--sticky-header", default=DEFAULT_STICKY_HEADER, help="Header hashed to pick a rollstrategy group")
+    args = parser.parse_args(argv)
+
+    result = behavior_diff(args.log, args.old, args.new, workers=args.workers, chunk_size=args.chunk_size, sticky_header=args.sticky_header)
+    json.dump(result.summary(), sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
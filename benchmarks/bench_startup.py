@@ -0,0 +1,177 @@
+"""Measure how long app.py and every page it registers take to render.
+
+Each script is executed with Streamlit's AppTest in a fresh interpreter, so
+the first run pays everything a cold start (or the first visit of a page)
+pays: the imports the script reaches, whether at module level or inside the
+functions it calls, plus the page's own work. A second run in the same
+interpreter shows what every later rerun costs. Requires streamlit. Run from
+the repository root:
+
+    python -m benchmarks.bench_startup --output bench_startup.json
+    python -m benchmarks.bench_startup --compare bench_startup.json
+"""
+import argparse
+import ast
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+from benchmarks.run_benchmarks import compare
+
+APP_SCRIPT = "app.py"
+
+# Heaviest modules imported while rendering, listed per script.
+TOP_MODULES = 5
+
+# Written to stderr around the first run, so only its imports are attributed to the script.
+RUN_START = "bench-startup: run start"
+RUN_END = "bench-startup: run end"
+
+# Renders a script twice with AppTest and prints the timings as JSON.
+_PROBE = f"""
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+app = AppTest.from_file(sys.argv[1], default_timeout=float(sys.argv[2]))
+before = set(sys.modules)
+print({RUN_START!r}, file=sys.stderr, flush=True)
+start = time.perf_counter()
+app.run()
+first_run = time.perf_counter() - start
+print({RUN_END!r}, file=sys.stderr, flush=True)
+packages = sorted({{name.split(".")[0] for name in set(sys.modules) - before if not name.startswith("_")}})
+start = time.perf_counter()
+app.run()
+rerun = time.perf_counter() - start
+print(json.dumps({{
+    "first_run": first_run,
+    "rerun": rerun,
+    "packages": packages,
+    "exceptions": [str(element.message) for element in app.exception],
+}}))
+"""
+
+
+def page_scripts(app_path=APP_SCRIPT):
+    """Return app.py followed by the page scripts it registers with st.Page, in order."""
+    with open(app_path) as f:
+        tree = ast.parse(f.read(), app_path)
+    scripts = [app_path]
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and getattr(node.func, "attr", None) == "Page" and node.args:
+            if isinstance(node.args[0], ast.Constant) and node.args[0].value not in scripts:
+                scripts.append(node.args[0].value)
+    return scripts
+
+
+def _importtime(stderr):
+    """Return {module: cumulative microseconds} of the top-level imports made during the first run."""
+    modules = {}
+    inside = False
+    for line in stderr.splitlines():
+        if line == RUN_START:
+            inside = True
+        elif line == RUN_END:
+            break
+        elif inside and line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|", 2)
+            if name.startswith("  ") or not cumulative.strip().isdigit():
+                continue  # Nested import, already counted by its parent
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def measure_script(script, repeat, timeout):
+    """Render a script in `repeat` fresh interpreters and summarize the cost."""
+    first_runs = []
+    reruns = []
+    modules = {}
+    result = {}
+    for _ in range(repeat):
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _PROBE, os.path.abspath(script), str(timeout)],
+            capture_output=True, text=True,
+        )
+        if process.returncode != 0:
+            raise RuntimeError(f"{script} could not be rendered:\n{process.stderr[-2000:]}")
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        first_runs.append(result["first_run"])
+        reruns.append(result["rerun"])
+        for name, micros in _importtime(process.stderr).items():
+            modules.setdefault(name, []).append(micros)
+    top = sorted(((statistics.median(values), name) for name, values in modules.items()), reverse=True)[:TOP_MODULES]
+    return {
+        "seconds_min": min(first_runs),
+        "seconds_median": statistics.median(first_runs),
+        "rerun_seconds_median": statistics.median(reruns),
+        "top_modules": [{"module": name, "seconds": micros / 1e6} for micros, name in top],
+        "packages": result["packages"],
+        "exceptions": result["exceptions"],
+    }
+
+
+def run(repeat, app_path=APP_SCRIPT, timeout=30):
+    """Measure every script and return the machine-readable results."""
+    results = []
+    for script in page_scripts(app_path):
+        if not os.path.exists(script):
+            continue
+        result = {"tier": "startup", "operation": script, **measure_script(script, repeat, timeout)}
+        results.append(result)
+        heaviest = ", ".join(f"{entry['module']} {entry['seconds'] * 1000:.1f}" for entry in result["top_modules"][:3])
+        note = f"  (exceptions: {len(result['exceptions'])})" if result["exceptions"] else ""
+        print(f"{script:<24} {result['seconds_median'] * 1000:9.2f} ms first, {result['rerun_seconds_median'] * 1000:9.2f} ms rerun  [{heaviest}]{note}", file=sys.stderr)
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the render time of the dashboard and each of its pages.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per script")
+    parser.add_argument("--app", default=APP_SCRIPT, help="Streamlit entry point registering the pages")
+    parser.add_argument("--timeout", type=float, default=30, help="Seconds a single render may take")
+    parser.add_argument("--output", default=None, help="Write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", default=None, help="Baseline JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown reported as a regression")
+    parser.add_argument("--min-delta", type=float, default=0.005, help="Ignore slowdowns below this many seconds")
+    args = parser.parse_args(argv)
+
+    if importlib.util.find_spec("streamlit") is None:
+        print("streamlit is not installed; pages can only be measured by rendering them (pip install streamlit).", file=sys.stderr)
+        return 2
+
+    try:
+        current = run(args.repeat, args.app, args.timeout)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+    else:
+        json.dump(current, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), current, args.threshold, args.min_delta)
+        for _, script, old, new in regressions:
+            print(f"REGRESSION {script}: {old * 1000:.2f} ms -> {new * 1000:.2f} ms", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
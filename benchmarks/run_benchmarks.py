@@ -0,0 +1,182 @@
+"""Benchmark config loading, validation, conversion, diffing and page data preparation.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --tiers small,medium --output bench.json
+    python -m benchmarks.run_benchmarks --compare bench.json
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import yaml
+
+from apisix_converter import convert_to_apisix_config, write_apisix_config
+from benchmarks.synthetic import TIERS, generate_config, mutate_config, write_config
+import config_loader
+from config_diff import categorize_diff_records, diff_yaml_files
+from config_loader import config_cache, load_and_validate_config, load_service
+from config_validator import load_yaml, service_check_cache, validate_config
+
+
+def measure(func, repeat):
+    """Time func() `repeat` times, then run it once more under tracemalloc for peak memory."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "seconds_min": min(timings),
+        "seconds_median": statistics.median(timings),
+        "peak_bytes": peak,
+    }
+
+
+@contextlib.contextmanager
+def snapshots(enabled):
+    """Temporarily turn config snapshots on or off, whatever DISPATCHER_SNAPSHOTS says."""
+    previous, config_loader.SNAPSHOTS_ENABLED = config_loader.SNAPSHOTS_ENABLED, enabled
+    try:
+        yield
+    finally:
+        config_loader.SNAPSHOTS_ENABLED = previous
+
+
+def tier_operations(directory, shape):
+    """Build the configs for one tier and return the (name, callable) pairs to time."""
+    config = generate_config(**shape)
+    base_path = os.path.join(directory, "base.yaml")
+    changed_path = os.path.join(directory, "changed.yaml")
+    write_config(config, base_path)
+    write_config(mutate_config(config), changed_path)
+    diff = diff_yaml_files(base_path, changed_path)
+    some_service = config["services"][len(config["services"]) // 2]["name"]
+
+    def validate_cold():
+        service_check_cache.clear()
+        validate_config(config)
+
+    def load_cold():
+        # First load after an edit: nothing cached, no snapshot to fall back on.
+        config_cache.invalidate()
+        service_check_cache.clear()
+        with snapshots(False):
+            load_and_validate_config(base_path)
+
+    def load_snapshot():
+        # Fresh process with an up-to-date snapshot on disk.
+        config_cache.invalidate()
+        with snapshots(True):
+            load_and_validate_config(base_path)
+
+    load_snapshot()  # Writes the snapshot
+
+    return [
+        ("load_yaml", lambda: load_yaml(base_path)),
+        ("validate_config", validate_cold),
+        ("validate_config_incremental", lambda: validate_config(config)),
+        ("load_and_validate_config_cold", load_cold),
+        ("load_and_validate_config_snapshot", load_snapshot),
+        ("load_and_validate_config_cached", lambda: load_and_validate_config(base_path)),
+        ("convert_to_apisix_config", lambda: convert_to_apisix_config(config)),
+        ("write_apisix_config", lambda: write_apisix_config(config, io.StringIO())),
+        ("diff_yaml_files", lambda: diff_yaml_files(base_path, changed_path)),
+        ("page_view_config_yaml_dump", lambda: yaml.dump(config, default_flow_style=False)),
+        ("page_view_services_load_service", lambda: load_service(base_path, some_service)),
+        ("page_diff_categorize", lambda: categorize_diff_records(diff)),
+    ]
+
+
+def run(tiers, repeat, operations=None):
+    """Run the suite and return the machine-readable results."""
+    results = []
+    for tier in tiers:
+        shape = TIERS[tier]
+        with tempfile.TemporaryDirectory() as directory:
+            for name, func in tier_operations(directory, shape):
+                if operations and name not in operations:
+                    continue
+                result = {"tier": tier, "operation": name, **shape, **measure(func, repeat)}
+                results.append(result)
+                print(f"{tier:>7} {name:<36} {result['seconds_median'] * 1000:10.2f} ms  {result['peak_bytes'] / 1e6:8.1f} MB", file=sys.stderr)
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "libyaml": bool(getattr(yaml, "__with_libyaml__", False)),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold, min_delta=0.001):
+    """Return (tier, operation, old, new) rows whose median time grew by more than threshold.
+
+    Slowdowns smaller than min_delta seconds are ignored as timer noise.
+    """
+    previous = {(row["tier"], row["operation"]): row for row in baseline["results"]}
+    regressions = []
+    for row in current["results"]:
+        old = previous.get((row["tier"], row["operation"]))
+        if old is None:
+            continue
+        if row["seconds_median"] > old["seconds_median"] * (1 + threshold) and row["seconds_median"] - old["seconds_median"] > min_delta:
+            regressions.append((row["tier"], row["operation"], old["seconds_median"], row["seconds_median"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dispatcher config benchmark suite.")
+    parser.add_argument("--tiers", default="small,medium", help=f"Comma-separated tiers ({', '.join(TIERS)})")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per operation")
+    parser.add_argument("--operations", default=None, help="Comma-separated subset of operations to run")
+    parser.add_argument("--output", default=None, help="Write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", default=None, help="Baseline JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown reported as a regression")
+    parser.add_argument("--min-delta", type=float, default=0.001, help="Ignore slowdowns below this many seconds")
+    args = parser.parse_args(argv)
+
+    tiers = [tier.strip() for tier in args.tiers.split(",") if tier.strip()]
+    unknown = [tier for tier in tiers if tier not in TIERS]
+    if unknown:
+        parser.error(f"unknown tiers: {', '.join(unknown)}")
+    operations = set(args.operations.split(",")) if args.operations else None
+
+    current = run(tiers, args.repeat, operations)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+    else:
+        json.dump(current, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), current, args.threshold, args.min_delta)
+        for tier, operation, old, new in regressions:
+            print(f"REGRESSION {tier} {operation}: {old * 1000:.2f} ms -> {new * 1000:.2f} ms", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import copy
+import random
+
+import yaml
+
+# Size tiers used by the benchmark suite: services, matches and rules per
+# service, upstreams and rollstrategy groups per service.
+TIERS = {
+    "small": {"services": 100, "matches": 10, "rules": 10, "upstreams": 2, "groups": 2},
+    "medium": {"services": 1000, "matches": 20, "rules": 20, "upstreams": 3, "groups": 3},
+    "large": {"services": 5000, "matches": 20, "rules": 20, "upstreams": 4, "groups": 4},
+}
+
+Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+def split_weights(count, rng):
+    """Return count positive integer weights summing to 100."""
+    cuts = sorted(rng.sample(range(1, 100), count - 1))
+    return [b - a for a, b in zip([0] + cuts, cuts + [100])]
+
+
+def generate_service(index, matches=10, rules=10, upstreams=2, groups=2, rng=None):
+    """Generate one service shaped like the entries of config/input.yaml."""
+    rng = rng or random.Random(index)
+    name = f"SVC{index:05d}"
+    slug = name.lower()
+    colors = ["blue", "green", "red", "yellow", "purple", "orange"]
+    upstream_list = [
+        {
+            "id": f"{slug}-{colors[i % len(colors)]}{i // len(colors) or ''}",
+            "target": f"{slug}-{colors[i % len(colors)]}.k8s.svc.cluster.local",
+            "port": 80,
+            "version": f"2024.M{410 + i}.0",
+        }
+        for i in range(upstreams)
+    ]
+    match_list = []
+    for i in range(matches):
+        # Mostly exact tool ids, with a share of anchored type regexes.
+        if i % 4 == 3:
+            match_list.append({"id": f"Match{i + 1}", "header_name": "X-Tool-Type", "operator": "~=", "value": f"^type{i}.*"})
+        else:
+            match_list.append({"id": f"Match{i + 1}", "header_name": "X-Tool-Id", "operator": "==", "value": f"tool{index}-{i}"})
+    rule_list = []
+    for i in range(rules):
+        referenced = rng.sample(match_list, min(len(match_list), rng.randint(1, 3)))
+        rule_list.append({
+            "id": f"rule-{i + 1}",
+            "matches": [match["id"] for match in referenced],
+            "upstream_id": upstream_list[rng.randrange(1, len(upstream_list)) if len(upstream_list) > 1 else 0]["id"],
+        })
+    service = {
+        "name": name,
+        "admin_state": "enabled",
+        "uri": f"/{slug}/",
+        "default_upstream": upstream_list[0]["id"],
+        "matches": match_list,
+        "rules": rule_list,
+        "upstreams": upstream_list,
+        "rollstrategy": None,
+    }
+    groups = min(groups, upstreams)
+    if groups > 1:
+        service["rollstrategy"] = {
+            "groups": [
+                {"id": chr(65 + i), "upstream_id": upstream_list[i]["id"], "weight": weight}
+                for i, weight in enumerate(split_weights(groups, rng))
+            ]
+        }
+    return service
+
+
+def generate_config(services=100, matches=10, rules=10, upstreams=2, groups=2, seed=0):
+    """Generate a valid configuration with the given shape."""
+    rng = random.Random(seed)
+    return {"services": [generate_service(i, matches, rules, upstreams, groups, rng) for i in range(services)]}
+
+
+def mutate_config(config, fraction=0.05, seed=1):
+    """Return a copy of config with a fraction of its services edited, added or removed."""
+    rng = random.Random(seed)
+    mutated = copy.deepcopy(config)
+    services = mutated["services"]
+    for service in rng.sample(services, max(1, int(len(services) * fraction))):
+        action = rng.randrange(3)
+        if action == 0 and service["upstreams"]:
+            service["upstreams"][-1]["port"] = 8080
+        elif action == 1 and service["matches"]:
+            service["matches"][0]["value"] = f"{service['matches'][0]['value']}-new"
+        else:
+            service["uri"] = f"{service['uri']}v2/"
+    del services[rng.randrange(len(services))]
+    services.append(generate_service(len(services) + 100000, rng=rng))
+    return mutated
+
+
+def write_config(config, file_path: str):
+    """Write a config to a YAML file."""
+    with open(file_path, "w") as f:
+        yaml.dump(config, f, Dumper=Dumper, default_flow_style=False, sort_keys=False)
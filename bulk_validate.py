@@ -0,0 +1,126 @@
+"""Validate many dispatcher configs at once and stream the results as JSON lines.
+
+    python bulk_validate.py generated/ config/ --workers 8 > results.jsonl
+
+Every *.yaml/*.yml file below the given directories is validated; split
+config directories (with a manifest.yaml) are validated as one merged
+config. Exits with status 1 if any config is invalid. Only the validation
+modules are imported, never streamlit or pandas, so start-up stays cheap.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from config_index import ConfigIndex, is_config_dir
+from config_validator import ConfigValidationError, ValidationIssue, format_path, parse_yaml_with_lines, raise_for_issues, validate_config
+
+YAML_SUFFIXES = (".yaml", ".yml")
+
+
+def find_configs(paths):
+    """Yield the configs to validate: YAML files and split config directories, sorted per directory."""
+    for path in paths:
+        if os.path.isfile(path) or is_config_dir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            split = [name for name in dirs if is_config_dir(os.path.join(root, name))]
+            for name in split:
+                yield os.path.join(root, name)
+            dirs[:] = [name for name in dirs if name not in split and not name.startswith(".")]
+            for name in sorted(files):
+                if name.endswith(YAML_SUFFIXES) and not name.startswith(".") and name != "manifest.yaml":
+                    yield os.path.join(root, name)
+
+
+def _validate(path):
+    if os.path.isdir(path):
+        index = ConfigIndex(path, workers=1)
+        index.refresh()
+        raise_for_issues(index.issues)
+        return index.issues
+    with open(path, "rb") as f:
+        config, lines = parse_yaml_with_lines(f.read())
+    return validate_config(config, lines)
+
+
+def validate_path(path):
+    """Validate one config and return its result as a JSON-serializable dict."""
+    start = time.perf_counter()
+    try:
+        issues = _validate(path)
+    except ConfigValidationError as e:
+        issues = e.issues or [ValidationIssue((), str(e), "error", None)]
+    except OSError as e:
+        issues = [ValidationIssue((), str(e), "error", None)]
+    except Exception as e:  # A validator bug must not end the run for every other file
+        issues = [ValidationIssue((), f"Validation crashed: {type(e).__name__}: {e}", "error", None)]
+    errors = sum(1 for issue in issues if issue.severity == "error")
+    return {
+        "path": path,
+        "valid": errors == 0,
+        "errors": errors,
+        "warnings": len(issues) - errors,
+        "issues": [
+            {"path": format_path(issue.path), "line": issue.line, "severity": issue.severity, "message": issue.message}
+            for issue in issues
+        ],
+        "seconds": round(time.perf_counter() - start, 6),
+    }
+
+
+def iter_results(paths, workers=None):
+    """Validate configs and yield their results in completion order."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for path in paths:
+            yield validate_path(path)
+        return
+
+    # Keep a bounded number of files in flight so huge variant sets stream steadily.
+    max_pending = workers * 4
+    with ProcessPoolExecutor(workers) as pool:
+        pending = set()
+        for path in paths:
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(pool.submit(validate_path, path))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate every dispatcher config under the given directories.")
+    parser.add_argument("paths", nargs="+", help="Directories (searched recursively) or individual config files")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--errors-only", action="store_true", help="Only print results of invalid configs")
+    args = parser.parse_args(argv)
+
+    missing = [path for path in args.paths if not os.path.exists(path)]
+    if missing:
+        parser.error(f"not found: {', '.join(missing)}")
+
+    total = failed = 0
+    for result in iter_results(find_configs(args.paths), args.workers):
+        total += 1
+        if not result["valid"]:
+            failed += 1
+        elif args.errors_only:
+            continue
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+
+    print(f"{total} configs validated, {failed} invalid", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
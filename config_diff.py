@@ -0,0 +1,164 @@
+from collections import namedtuple
+
+import os
+
+from config_index import get_config_index
+from config_validator import ConfigValidationError, load_yaml, service_digest
+from perf_metrics import timed
+
+# One structural difference between two configs.
+#   change:      "Added", "Removed", "Changed" or "Reordered"
+#   object_type: "config", "services", "matches", "rules", "upstreams" or "rollstrategy"
+#   service:     service name (None for top-level config keys)
+#   object_id:   id of the match/rule/upstream/group, None for the service itself
+#   property:    changed field, None when a whole object was added or removed;
+#                "order" for Reordered records, whose values are the id lists
+DiffRecord = namedtuple("DiffRecord", ["change", "object_type", "service", "object_id", "property", "old_value", "new_value"])
+
+# Service sections holding lists of objects identified by their `id`.
+ID_SECTIONS = ("matches", "rules", "upstreams")
+
+
+def _index(items, key):
+    """Index a list of dicts by key, keeping file order."""
+    return {item.get(key): item for item in items or [] if isinstance(item, dict)}
+
+
+def _diff_fields(old, new, object_type, service, object_id, skip=()):
+    """Yield Changed/Added/Removed property records between two dicts."""
+    for field, old_value in old.items():
+        if field in skip:
+            continue
+        if field not in new:
+            yield DiffRecord("Removed", object_type, service, object_id, field, old_value, None)
+        elif new[field] != old_value:
+            yield DiffRecord("Changed", object_type, service, object_id, field, old_value, new[field])
+    for field, new_value in new.items():
+        if field not in old and field not in skip:
+            yield DiffRecord("Added", object_type, service, object_id, field, None, new_value)
+
+
+def _diff_objects(old_items, new_items, object_type, service, key="id"):
+    """Pair two lists of objects by key and yield their differences."""
+    old_index = _index(old_items, key)
+    new_index = _index(new_items, key)
+    for object_id, old in old_index.items():
+        new = new_index.get(object_id)
+        if new is None:
+            yield DiffRecord("Removed", object_type, service, object_id, None, old, None)
+        elif new != old:
+            yield from _diff_fields(old, new, object_type, service, object_id)
+    for object_id, new in new_index.items():
+        if object_id not in old_index:
+            yield DiffRecord("Added", object_type, service, object_id, None, None, new)
+
+
+def _diff_order(old_items, new_items, object_type, service, key="id"):
+    """Yield a Reordered record when the objects present on both sides changed order."""
+    old_ids = [item.get(key) for item in old_items or [] if isinstance(item, dict)]
+    new_ids = [item.get(key) for item in new_items or [] if isinstance(item, dict)]
+    common = set(old_ids) & set(new_ids)
+    old_order = [ident for ident in old_ids if ident in common]
+    new_order = [ident for ident in new_ids if ident in common]
+    if old_order != new_order:
+        yield DiffRecord("Reordered", object_type, service, None, "order", old_order, new_order)
+
+
+def diff_service(old, new):
+    """Yield the differences between two versions of the same service."""
+    name = new.get("name")
+    yield from _diff_fields(old, new, "services", name, None, skip=ID_SECTIONS + ("rollstrategy",))
+    for section in ID_SECTIONS:
+        yield from _diff_objects(old.get(section), new.get(section), section, name)
+    # The first matching rule wins, so rule order is behavior.
+    yield from _diff_order(old.get("rules"), new.get("rules"), "rules", name)
+
+    old_strategy = old.get("rollstrategy") or {}
+    new_strategy = new.get("rollstrategy") or {}
+    if old_strategy == new_strategy:
+        return
+    if not old_strategy or not new_strategy:
+        change = "Added" if new_strategy else "Removed"
+        yield DiffRecord(change, "rollstrategy", name, None, None, old_strategy or None, new_strategy or None)
+        return
+    yield from _diff_fields(old_strategy, new_strategy, "rollstrategy", name, None, skip=("groups",))
+    yield from _diff_objects(old_strategy.get("groups"), new_strategy.get("groups"), "rollstrategy", name)
+    yield from _diff_order(old_strategy.get("groups"), new_strategy.get("groups"), "rollstrategy", name)
+
+
+@timed("diff_configs")
+def diff_configs(old, new, old_digests=None, new_digests=None):
+    """Diff two configs, pairing services by name and their objects by id.
+
+    Besides added, removed and changed objects, a changed order of services,
+    rules or rollstrategy groups is reported as a Reordered record.
+
+    Services whose content hash is identical are skipped without being
+    walked. Precomputed ``{name: digest}`` maps can be passed in to avoid
+    hashing again.
+    """
+    old = old or {}
+    new = new or {}
+    records = list(_diff_fields(old, new, "config", None, None, skip=("services",)))
+
+    records.extend(_diff_order(old.get("services"), new.get("services"), "services", None, key="name"))
+
+    old_services = _index(old.get("services"), "name")
+    new_services = _index(new.get("services"), "name")
+    for name, old_service in old_services.items():
+        if name not in new_services:
+            records.append(DiffRecord("Removed", "services", name, None, None, old_service, None))
+    for name, new_service in new_services.items():
+        old_service = old_services.get(name)
+        if old_service is None:
+            records.append(DiffRecord("Added", "services", name, None, None, None, new_service))
+            continue
+        old_digest = old_digests[name] if old_digests and name in old_digests else service_digest(old_service)
+        new_digest = new_digests[name] if new_digests and name in new_digests else service_digest(new_service)
+        if old_digest != new_digest:
+            records.extend(diff_service(old_service, new_service))
+    return records
+
+
+def _load_for_diff(path):
+    """Load a YAML file, or the merged config of a split config directory."""
+    if os.path.isdir(path):
+        return get_config_index(path).config()
+    return load_yaml(path)
+
+
+@timed("diff_yaml_files")
+def diff_yaml_files(file1, file2):
+    """Diff two YAML files (or split config directories) and return the list of DiffRecords."""
+    try:
+        return diff_configs(_load_for_diff(file1), _load_for_diff(file2))
+    except ConfigValidationError as e:
+        raise ConfigValidationError(f"Error diffing files: {str(e)}")
+
+
+def describe_record(record):
+    """Return a short label for the object a record refers to."""
+    parts = [part for part in (record.service, record.object_type if record.object_id is not None else None, record.object_id) if part is not None]
+    return " / ".join(str(part) for part in parts) or "config"
+
+
+def categorize_diff_records(records):
+    """Organize records by change type and object type, as shown on the diff page."""
+    categorized = {
+        "Added": {},
+        "Removed": {},
+        "Changed": {},
+        "Reordered": {}
+    }
+    for record in records:
+        changes = categorized[record.change].setdefault(record.object_type, [])
+        if record.property is None:
+            changes.append(describe_record(record))
+        else:
+            changes.append({
+                "object": describe_record(record),
+                "property": record.property,
+                "old_value": record.old_value,
+                "new_value": record.new_value
+            })
+    return categorized
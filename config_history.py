@@ -0,0 +1,205 @@
+"""Content-addressed version history of configuration files.
+
+Every recorded revision is stored as one blob per service, keyed by the
+service's content hash (``service_digest``), plus a manifest listing the
+services of that revision in file order. Services that did not change
+between revisions share their blob, so a revision that edits one service
+adds one service blob and one manifest. Layout under ``.config_history/``::
+
+    objects/ab/cdef...     zlib-compressed JSON blob (service, root keys or manifest)
+    revisions/<file>.jsonl one line per revision of a config file, oldest first
+    backups/<file>.<ns>    raw copy of a file that was not a config when it was rolled back
+"""
+import json
+import os
+import threading
+import time
+import zlib
+from collections import namedtuple
+from urllib.parse import quote
+
+import yaml
+
+from config_diff import diff_configs
+from config_validator import ConfigValidationError, load_yaml, service_digest, validate_config
+from config_writer import _IndentedDumper, atomic_write
+from perf_metrics import timed
+
+HISTORY_DIR = os.environ.get("DISPATCHER_HISTORY_DIR", ".config_history")
+
+# One entry of a file's revision log.
+#   revision:  manifest hash identifying the revision
+#   timestamp: time.time() when it was recorded
+#   message:   free-form description ("Edit service RMS", "Rollback to ...")
+#   services:  number of services in the revision
+#   changed:   names of services added, removed or changed since the previous revision
+Revision = namedtuple("Revision", ["revision", "timestamp", "message", "services", "changed"])
+
+
+def _encode(obj):
+    return json.dumps(obj, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class ConfigHistory:
+    """Deduplicated revision store for configuration files."""
+
+    def __init__(self, root=HISTORY_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest[2:])
+
+    def _log_path(self, file_path):
+        name = quote(os.path.relpath(os.path.abspath(file_path)), safe="")
+        return os.path.join(self.root, "revisions", name + ".jsonl")
+
+    def _put(self, digest, obj):
+        """Store a blob unless an identical one is already present."""
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        atomic_write(path, zlib.compress(_encode(obj)))
+
+    def _get(self, digest):
+        try:
+            with open(self._object_path(digest), "rb") as f:
+                return json.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            raise ConfigValidationError(f"History object {digest} is missing")
+
+    def revisions(self, file_path):
+        """Return the recorded revisions of a config file, oldest first."""
+        try:
+            with open(self._log_path(file_path)) as f:
+                return [Revision(**json.loads(line)) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def resolve(self, file_path, revision):
+        """Return the full revision id for a (possibly abbreviated) one."""
+        matches = [entry.revision for entry in self.revisions(file_path) if entry.revision.startswith(revision)]
+        if not matches:
+            raise ConfigValidationError(f"No revision {revision} recorded for {file_path}")
+        if len(set(matches)) > 1:
+            raise ConfigValidationError(f"Revision {revision} is ambiguous for {file_path}")
+        return matches[0]
+
+    def manifest(self, revision):
+        """Return the manifest of a revision: {"root": digest, "services": [[name, digest], ...]}."""
+        return self._get(revision)
+
+    @timed("history_record")
+    def record(self, file_path, config, message=""):
+        """Record config as the newest revision of file_path and return its id.
+
+        Nothing is written when config equals the latest recorded revision.
+        """
+        services = config.get("services") or []
+        root = {key: value for key, value in config.items() if key != "services"}
+        root_digest = service_digest(root)
+        entries = [[service.get("name"), service_digest(service)] for service in services]
+        manifest = {"root": root_digest, "services": entries}
+        revision = service_digest(manifest)
+
+        with self._lock:
+            history = self.revisions(file_path)
+            previous = history[-1] if history else None
+            if previous is not None and previous.revision == revision:
+                return revision
+
+            self._put(root_digest, root)
+            for service, (_, digest) in zip(services, entries):
+                self._put(digest, service)
+            self._put(revision, manifest)
+
+            if previous is not None:
+                old = dict(map(tuple, self.manifest(previous.revision)["services"]))
+                new = dict(map(tuple, entries))
+                changed = sorted(name for name in old.keys() | new.keys() if old.get(name) != new.get(name))
+            else:
+                changed = [name for name, _ in entries]
+            entry = Revision(revision, time.time(), message, len(entries), changed)
+            log_path = self._log_path(file_path)
+            os.makedirs(os.path.dirname(log_path), exist_ok=True)
+            with open(log_path, "a") as f:
+                f.write(json.dumps(entry._asdict()) + "\n")
+        return revision
+
+    def record_file(self, file_path, message=""):
+        """Record the current content of a config file."""
+        return self.record(file_path, load_yaml(file_path) or {}, message)
+
+    def checkout(self, revision):
+        """Rebuild the full config of a revision."""
+        manifest = self.manifest(revision)
+        config = dict(self._get(manifest["root"]))
+        config["services"] = [self._get(digest) for _, digest in manifest["services"]]
+        return config
+
+    @timed("history_diff")
+    def diff(self, old_revision, new_revision):
+        """Diff two revisions, loading only the services whose hashes differ."""
+        old_manifest = self.manifest(old_revision)
+        new_manifest = self.manifest(new_revision)
+        old_digests = dict(map(tuple, old_manifest["services"]))
+        new_digests = dict(map(tuple, new_manifest["services"]))
+
+        def partial(manifest, other):
+            # Services identical on both sides are never read: diff_configs
+            # skips them by digest, so a name-only stand-in is enough.
+            config = dict(self._get(manifest["root"]))
+            config["services"] = [
+                {"name": name} if other.get(name) == digest else self._get(digest)
+                for name, digest in manifest["services"]
+            ]
+            return config
+
+        return diff_configs(
+            partial(old_manifest, new_digests),
+            partial(new_manifest, old_digests),
+            old_digests, new_digests,
+        )
+
+    def save_current(self, file_path, message="Before rollback"):
+        """Record the current content of file_path before it is overwritten.
+
+        A file that cannot be recorded as a config (unparseable YAML, not a
+        mapping) is copied verbatim under ``backups/`` instead. Returns the
+        revision id or the backup path, or None if the file does not exist.
+        """
+        try:
+            with open(file_path, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            config = load_yaml(file_path) or {}
+        except ConfigValidationError:
+            config = None
+        if isinstance(config, dict):
+            return self.record(file_path, config, message)
+        name = quote(os.path.relpath(os.path.abspath(file_path)), safe="")
+        backup = os.path.join(self.root, "backups", f"{name}.{time.time_ns()}")
+        os.makedirs(os.path.dirname(backup), exist_ok=True)
+        atomic_write(backup, content)
+        return backup
+
+    def rollback(self, file_path, revision, message=None):
+        """Write a recorded revision back to file_path atomically and record it as the newest revision.
+
+        The current content is recorded first, so edits made on disk since
+        the last recorded revision can be restored by rolling back again.
+        """
+        revision = self.resolve(file_path, revision)
+        config = self.checkout(revision)
+        validate_config(config)
+        self.save_current(file_path)
+        content = yaml.dump(config, Dumper=_IndentedDumper, default_flow_style=False, sort_keys=False, allow_unicode=True)
+        atomic_write(file_path, content)
+        self.record(file_path, config, message or f"Rollback to {revision[:10]}")
+        return config
+
+
+history = ConfigHistory()
@@ -0,0 +1,193 @@
+import glob
+import hashlib
+import os
+import threading
+
+from config_validator import (
+    ConfigValidationError, ValidationIssue, check_services_together, line_for,
+    parse_yaml_with_lines, service_check_cache,
+)
+from perf_metrics import timed
+
+MANIFEST_NAME = "manifest.yaml"
+
+# Spawning a process pool only pays off when several files need parsing.
+PARALLEL_MIN_FILES = 4
+
+
+def is_config_dir(path: str):
+    """Return True if path is a split configuration directory (it has a manifest)."""
+    return os.path.isfile(os.path.join(path, MANIFEST_NAME))
+
+
+def manifest_files(directory: str):
+    """Return the config files of a directory in manifest order.
+
+    The manifest lists files or glob patterns relative to the directory
+    under ``files``. Without a manifest every ``*.yaml``/``*.yml`` below
+    the directory is used, sorted by path.
+    """
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    if os.path.isfile(manifest_path):
+        with open(manifest_path, "rb") as f:
+            manifest, _ = parse_yaml_with_lines(f.read())
+        patterns = (manifest or {}).get("files") if isinstance(manifest, dict) else None
+        if not isinstance(patterns, list):
+            raise ConfigValidationError(f"{manifest_path}: 'files' must be a list of file names or glob patterns")
+    else:
+        patterns = ["**/*.yaml", "**/*.yml"]
+
+    files = []
+    seen = set()
+    for pattern in patterns:
+        matched = sorted(glob.glob(os.path.join(directory, str(pattern)), recursive=True))
+        if not matched and not glob.has_magic(str(pattern)):
+            raise ConfigValidationError(f"{manifest_path}: listed file '{pattern}' does not exist")
+        for path in matched:
+            path = os.path.abspath(path)
+            if path not in seen and os.path.basename(path) != MANIFEST_NAME:
+                seen.add(path)
+                files.append(path)
+    return files
+
+
+def load_config_file(path: str):
+    """Parse one config file and run the per-service checks on it.
+
+    Returns (digest, services, issues, lines); issue paths are relative to
+    the file. Runs in worker processes, so it only returns plain data.
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()
+    try:
+        config, lines = parse_yaml_with_lines(content)
+    except ConfigValidationError as e:
+        return digest, [], [ValidationIssue((), str(e), "error", None)], {}
+
+    if not isinstance(config, dict) or not isinstance(config.get("services"), list):
+        return digest, [], [ValidationIssue((), "Missing 'services' section in configuration", "error", line_for((), lines))], lines
+    services = config["services"]
+    issues = []
+    for index, service in enumerate(services):
+        for path_, message, severity in service_check_cache.check(service):
+            full_path = ("services", index) + path_
+            issues.append(ValidationIssue(full_path, message, severity, line_for(full_path, lines)))
+    return digest, services, issues, lines
+
+
+class ConfigIndex:
+    """Merged, incrementally refreshed view of a split configuration directory.
+
+    Services from all files are merged in manifest order and indexed by
+    name and URI. ``refresh`` re-reads only the files whose mtime, size or
+    content changed, loading several of them in parallel.
+    """
+
+    def __init__(self, directory: str, workers=None):
+        self.directory = os.path.abspath(directory)
+        self.workers = workers or os.cpu_count() or 1
+        self.files = {}  # path -> {"stat": (mtime_ns, size), "digest", "services", "issues", "lines"}
+        self.order = []
+        self.by_name = {}
+        self.by_uri = {}
+        self.issues = []
+        self._config = None
+        self._lock = threading.Lock()
+
+    def relpath(self, path):
+        """Return path relative to the config directory."""
+        return os.path.relpath(path, self.directory)
+
+    def refresh(self):
+        """Reload changed files and rebuild the merged index. Returns the changed paths."""
+        with self._lock, timed("config_index_refresh"):
+            order = manifest_files(self.directory)
+            stale = []
+            for path in order:
+                stat = os.stat(path)
+                entry = self.files.get(path)
+                if entry is None or entry["stat"] != (stat.st_mtime_ns, stat.st_size):
+                    stale.append((path, (stat.st_mtime_ns, stat.st_size)))
+            removed = [path for path in self.files if path not in order]
+            for path in removed:
+                del self.files[path]
+
+            changed = self._load(stale)
+            if changed or removed or order != self.order:
+                self.order = order
+                self._rebuild()
+            return changed + removed
+
+    def _load(self, stale):
+        paths = [path for path, _ in stale]
+        if len(paths) >= PARALLEL_MIN_FILES and self.workers > 1:
+            # Imported here: multiprocessing is costly to import and most loads never need it.
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(min(self.workers, len(paths))) as pool:
+                results = list(pool.map(load_config_file, paths))
+        else:
+            results = [load_config_file(path) for path in paths]
+
+        changed = []
+        for (path, stat), (digest, services, issues, lines) in zip(stale, results):
+            entry = self.files.get(path)
+            if entry is not None and entry["digest"] == digest:
+                entry["stat"] = stat  # Touched but unchanged
+                continue
+            self.files[path] = {"stat": stat, "digest": digest, "services": services, "issues": issues, "lines": lines}
+            changed.append(path)
+        return changed
+
+    def _rebuild(self):
+        merged = []
+        origins = []
+        issues = []
+        for path in self.order:
+            entry = self.files[path]
+            name = self.relpath(path)
+            issues.extend(issue._replace(path=(name,) + issue.path) for issue in entry["issues"])
+            merged.extend(entry["services"])
+            origins.extend((path, index) for index in range(len(entry["services"])))
+
+        # Duplicate names and URIs, also across files; map merged positions back to files.
+        raw = []
+        check_services_together(merged, raw)
+        for path_, message, severity in raw:
+            file_path, index = origins[path_[1]]
+            local = ("services", index) + path_[2:]
+            issues.append(ValidationIssue((self.relpath(file_path),) + local, message, severity, line_for(local, self.files[file_path]["lines"])))
+
+        self.by_name = {}
+        self.by_uri = {}
+        for service, (path, _) in zip(merged, origins):
+            if isinstance(service, dict) and isinstance(service.get("name"), str):
+                self.by_name.setdefault(service["name"], (path, service))
+                if isinstance(service.get("uri"), str):
+                    self.by_uri.setdefault(service["uri"], service["name"])
+        self.issues = issues
+        self._config = {"services": merged}
+
+    def config(self):
+        """Return the merged configuration ({'services': [...]}), refreshing first."""
+        self.refresh()
+        return self._config
+
+    def file_of(self, name):
+        """Return the file that defines a service, or None."""
+        entry = self.by_name.get(name)
+        return entry[0] if entry else None
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_config_index(directory: str):
+    """Return the process-wide ConfigIndex of a directory."""
+    directory = os.path.abspath(directory)
+    with _indexes_lock:
+        index = _indexes.get(directory)
+        if index is None:
+            index = _indexes[directory] = ConfigIndex(directory)
+        return index
@@ -1,16 +1,190 @@
-from config_validator import load_yaml, validate_config, ConfigValidationError
+import hashlib
+import os
+import threading
+from collections import OrderedDict
 
+from config_index import get_config_index, is_config_dir
+from config_snapshot import open_snapshot, write_snapshot
+from config_validator import parse_yaml_with_lines, raise_for_issues, validate_config, validator_fingerprint, ConfigValidationError
+from perf_metrics import timed
+
+# Where the UI pages look for configuration files.
+CONFIG_DIRECTORY = "./config"
+DEFAULT_CONFIG_FILE = "config/input.yaml"
+
+# Limits of the process-wide config cache. Sizes are measured in bytes of
+# YAML source, which is a stable proxy for the size of the parsed object.
+CACHE_MAX_ENTRIES = 32
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Write a compiled snapshot next to every successfully validated YAML file.
+# Set DISPATCHER_SNAPSHOTS=0 to disable (e.g. on read-only config mounts).
+SNAPSHOTS_ENABLED = os.environ.get("DISPATCHER_SNAPSHOTS", "1") != "0"
+
+
+class ConfigCache:
+    """Process-wide LRU cache of parsed and validated configurations.
+
+    Entries are keyed by absolute path and revalidated against the file's
+    mtime and size; when those change the content hash decides whether the
+    file really needs to be parsed again. Cached configs are shared between
+    all callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # path -> (mtime_ns, size, digest, config)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, file_path: str, loader):
+        """Return the config for file_path, calling loader(path, content, digest, stat) on a miss."""
+        path = os.path.abspath(file_path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.invalidate(path)
+            raise ConfigValidationError(f"File not found: {file_path}")
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                self._entries.move_to_end(path)
+                return entry[3]
+
+        with open(path, 'rb') as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[2] == digest:
+                # Touched but unchanged: refresh the stat key, skip the parse.
+                self._store(path, (stat.st_mtime_ns, stat.st_size, digest, entry[3]))
+                return entry[3]
+
+        config = loader(path, content, digest, stat)
+        with self._lock:
+            self._store(path, (stat.st_mtime_ns, stat.st_size, digest, config))
+        return config
+
+    def peek(self, file_path: str):
+        """Return the cached config if it is still current, without loading anything."""
+        path = os.path.abspath(file_path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                return entry[3]
+        return None
+
+    def invalidate(self, file_path=None):
+        """Drop one cached file, or every entry when file_path is None."""
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            entry = self._entries.pop(os.path.abspath(file_path), None)
+            if entry:
+                self._bytes -= entry[1]
+
+    def _store(self, path, entry):
+        old = self._entries.pop(path, None)
+        if old:
+            self._bytes -= old[1]
+        self._entries[path] = entry
+        self._bytes += entry[1]
+        # Evict least recently used entries, always keeping the newest one.
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted[1]
+
+
+config_cache = ConfigCache()
+
+
+def _parse_and_validate(path, content, digest, stat):
+    if SNAPSHOTS_ENABLED:
+        snapshot = open_snapshot(path, digest=digest, validator=validator_fingerprint())
+        if snapshot is not None:
+            with timed("load_snapshot"):
+                return snapshot.load()
+
+    with timed("parse_yaml"):
+        config, lines = parse_yaml_with_lines(content)
+    validate_config(config, lines)
+    if SNAPSHOTS_ENABLED:
+        with timed("write_snapshot"):
+            write_snapshot(path, config, digest, stat, validator=validator_fingerprint())
+    return config
+
+
+def _load_config_dir(directory):
+    index = get_config_index(directory)
+    config = index.config()
+    raise_for_issues(index.issues)
+    return config
+
+
+@timed("load_and_validate_config")
 def load_and_validate_config(file_path: str):
-    """Load and validate the configuration."""
+    """Load and validate the configuration, reusing the cached result when the file is unchanged.
+
+    ``file_path`` may also be a split configuration directory, whose files
+    are merged into one config and reloaded individually when they change.
+    """
     try:
-        # Load the configuration
-        config = load_yaml(file_path)
-        
-        # Validate the configuration
-        validate_config(config)
-        
-        return config
+        if os.path.isdir(file_path):
+            return _load_config_dir(file_path)
+        return config_cache.get(file_path, _parse_and_validate)
     except ConfigValidationError as e:
-        raise ConfigValidationError(f"Configuration validation failed: {str(e)}")
+        raise ConfigValidationError(f"Configuration validation failed: {str(e)}", e.issues)
     except Exception as e:
         raise Exception(f"Unexpected error occurred while loading configuration: {str(e)}")
+
+
+def load_service_names(file_path: str):
+    """Return the service names of a config, reading only the snapshot index when possible."""
+    config = config_cache.peek(file_path)
+    if config is None and SNAPSHOTS_ENABLED:
+        snapshot = open_snapshot(file_path, validator=validator_fingerprint())
+        if snapshot is not None:
+            return snapshot.service_names()
+    config = config or load_and_validate_config(file_path)
+    return [service["name"] for service in config.get("services", [])]
+
+
+def load_service(file_path: str, name):
+    """Return a single service definition, reading only its snapshot blob when possible."""
+    config = config_cache.peek(file_path)
+    if config is None and SNAPSHOTS_ENABLED:
+        snapshot = open_snapshot(file_path, validator=validator_fingerprint())
+        if snapshot is not None:
+            return snapshot.service(name)
+    config = config or load_and_validate_config(file_path)
+    return next((s for s in config.get("services", []) if s["name"] == name), None)
+
+
+def service_source_file(file_path: str, name):
+    """Return the YAML file that defines a service (file_path itself unless it is a directory)."""
+    if os.path.isdir(file_path):
+        load_and_validate_config(file_path)
+        return get_config_index(file_path).file_of(name)
+    return file_path
+
+
+def list_config_sources(directory: str):
+    """List the YAML files of a directory plus its split config subdirectories (as 'name/')."""
+    sources = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.endswith('.yaml') and os.path.isfile(path):
+            sources.append(name)
+        elif os.path.isdir(path) and is_config_dir(path):
+            sources.append(name + "/")
+    return sources
@@ -0,0 +1,134 @@
+"""Compiled binary snapshots of validated configuration files.
+
+A snapshot lives next to its YAML source (``config/.input.yaml.snap``) and
+holds the validated config in marshal format: a small header with the source
+hash, the fingerprint of the validator that accepted it and an offset index,
+followed by one blob per service. Loading a single service only reads that
+service's blob.
+"""
+import marshal
+import os
+import struct
+import sys
+
+MAGIC = b"DSPSNAP1"
+FORMAT_VERSION = 1
+_LENGTH = struct.Struct("<I")
+
+
+def snapshot_path(file_path: str):
+    """Return the snapshot path belonging to a YAML file."""
+    directory, name = os.path.split(os.path.abspath(file_path))
+    return os.path.join(directory, f".{name}.snap")
+
+
+def write_snapshot(file_path: str, config, digest, stat=None, validator=None):
+    """Write the snapshot for a config validated by ``validator``. Returns False if it cannot be stored."""
+    stat = stat or os.stat(file_path)
+    try:
+        root = marshal.dumps({key: (None if key == "services" else value) for key, value in config.items()})
+        blobs = [marshal.dumps(service) for service in config.get("services", [])]
+    except ValueError:
+        return False  # Values marshal cannot encode (e.g. YAML timestamps)
+
+    index = []
+    offset = len(root)
+    for service, blob in zip(config.get("services", []), blobs):
+        index.append((service.get("name"), service.get("uri"), offset, len(blob)))
+        offset += len(blob)
+    header = marshal.dumps({
+        "version": FORMAT_VERSION,
+        "python": tuple(sys.version_info[:2]),
+        "validator": validator,
+        "source_digest": digest,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_size": stat.st_size,
+        "root_length": len(root),
+        "services": index,
+    })
+
+    path = snapshot_path(file_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(_LENGTH.pack(len(header)))
+            f.write(header)
+            f.write(root)
+            f.writelines(blobs)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+    return True
+
+
+class Snapshot:
+    """Lazy reader for a snapshot file."""
+
+    def __init__(self, path, header, data_offset):
+        self.path = path
+        self.header = header
+        self._data_offset = data_offset
+        self._index = {name: (offset, length) for name, _, offset, length in header["services"]}
+
+    def service_names(self):
+        """Return the service names in file order."""
+        return [name for name, _, _, _ in self.header["services"]]
+
+    def _read(self, f, offset, length):
+        f.seek(self._data_offset + offset)
+        return marshal.loads(f.read(length))
+
+    def service(self, name):
+        """Return a single service definition, or None if the snapshot has no such service."""
+        entry = self._index.get(name)
+        if entry is None:
+            return None
+        with open(self.path, "rb") as f:
+            return self._read(f, *entry)
+
+    def load(self):
+        """Materialize the whole config."""
+        with open(self.path, "rb") as f:
+            config = self._read(f, 0, self.header["root_length"])
+            if "services" in config:
+                f.seek(self._data_offset + self.header["root_length"])
+                config["services"] = [marshal.loads(f.read(length)) for _, _, _, length in self.header["services"]]
+        return config
+
+
+def open_snapshot(file_path: str, digest=None, stat=None, validator=None):
+    """Return the Snapshot for file_path if one exists and is fresh, else None.
+
+    Freshness is checked against the source content hash when ``digest`` is
+    given, otherwise against the source mtime and size. A snapshot written
+    under a different ``validator`` fingerprint is never fresh, since the
+    current rules might reject its config.
+    """
+    path = snapshot_path(file_path)
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (length,) = _LENGTH.unpack(f.read(_LENGTH.size))
+            header = marshal.loads(f.read(length))
+    except (OSError, EOFError, ValueError, TypeError, struct.error):
+        return None
+
+    if header.get("version") != FORMAT_VERSION or header.get("python") != tuple(sys.version_info[:2]):
+        return None
+    if header.get("validator") != validator:
+        return None
+    if digest is not None:
+        if header["source_digest"] != digest:
+            return None
+    else:
+        try:
+            stat = stat or os.stat(file_path)
+        except OSError:
+            return None
+        if header["source_mtime_ns"] != stat.st_mtime_ns or header["source_size"] != stat.st_size:
+            return None
+    return Snapshot(path, header, len(MAGIC) + _LENGTH.size + length)
@@ -1,96 +1,339 @@
+import hashlib
+import json
+import re
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+
 import yaml
 
+from perf_metrics import timed
+from regex_matcher import regex_risk
+from rule_analysis import analyze_rules
+
+# Use the libyaml-backed loader when PyYAML was built with it; it parses
+# large configs many times faster than the pure-Python implementation.
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 class ConfigValidationError(Exception):
     """Custom exception for configuration validation errors."""
-    pass
+    def __init__(self, message, issues=None):
+        super().__init__(message)
+        self.issues = issues or []
+
+# A single validation finding. `path` is a tuple of keys/indexes into the
+# config (e.g. ("services", 0, "matches", 2)), `line` the 1-based YAML line
+# when known, and `severity` either "error" or "warning".
+ValidationIssue = namedtuple("ValidationIssue", ["path", "message", "severity", "line"])
+
+def format_path(path):
+    """Render a config path tuple as services[0].matches[2].value."""
+    text = ""
+    for part in path:
+        text += f"[{part}]" if isinstance(part, int) else (f".{part}" if text else str(part))
+    return text
+
+def format_issue(issue):
+    """Render a ValidationIssue as a single human-readable line."""
+    location = format_path(issue.path) or "<root>"
+    if issue.line is not None:
+        location += f" (line {issue.line})"
+    return f"{location}: {issue.message}"
+
+def split_uri(uri):
+    """Split a URI into its path segments, ignoring the query string."""
+    path = uri.split("?", 1)[0]
+    return [segment for segment in path.split("/") if segment]
+
+def _canonical(value):
+    """Return value with every mapping turned into (key type, key, value) triples sorted by key text."""
+    if isinstance(value, dict):
+        return sorted(([type(key).__name__, str(key), _canonical(item)] for key, item in value.items()), key=lambda entry: entry[:2])
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    return value
+
+def service_digest(service):
+    """Return a stable content hash of a service definition."""
+    try:
+        payload = json.dumps(service, sort_keys=True, separators=(",", ":"), default=str)
+    except TypeError:
+        # YAML allows mappings mixing int and str keys, which json cannot sort.
+        payload = json.dumps(_canonical(service), separators=(",", ":"), default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+@lru_cache(maxsize=None)
+def validator_fingerprint():
+    """Return a hash of the validation code, so results stored by another version are not trusted."""
+    digest = hashlib.sha256()
+    for module in (__name__, "rule_analysis", "regex_matcher"):
+        with open(sys.modules[module].__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def parse_yaml(content):
+    """Parse YAML configuration content (str or bytes)."""
+    try:
+        return yaml.load(content, Loader=SafeLoader)
+    except yaml.YAMLError as e:
+        raise ConfigValidationError(f"YAML Parsing Error: {str(e)}")
+
+def parse_yaml_with_lines(content):
+    """Parse YAML content and return (config, lines) where lines maps config paths to line numbers."""
+    loader = SafeLoader(content)
+    try:
+        node = loader.get_single_node()
+        config = loader.construct_document(node) if node is not None else None
+    except yaml.YAMLError as e:
+        raise ConfigValidationError(f"YAML Parsing Error: {str(e)}")
+    finally:
+        loader.dispose()
+
+    lines = {}
+    stack = [((), node)] if node is not None else []
+    while stack:
+        path, node = stack.pop()
+        lines[path] = node.start_mark.line + 1
+        if isinstance(node, yaml.MappingNode):
+            for key_node, value_node in node.value:
+                if isinstance(key_node, yaml.ScalarNode):
+                    stack.append((path + (key_node.value,), value_node))
+        elif isinstance(node, yaml.SequenceNode):
+            stack.extend((path + (index,), item) for index, item in enumerate(node.value))
+    return config, lines
 
 def load_yaml(file_path: str):
     """Load the YAML configuration file."""
     try:
         with open(file_path, 'r') as f:
-            return yaml.safe_load(f)
-    except yaml.YAMLError as e:
-        raise ConfigValidationError(f"YAML Parsing Error: {str(e)}")
+            return parse_yaml(f)
     except FileNotFoundError:
         raise ConfigValidationError(f"File not found: {file_path}")
 
-def validate_service(service):
-    """Validate a single service configuration."""
+def _is_scalar(value):
+    """Return whether a value can be an ID (lists and mappings cannot)."""
+    return isinstance(value, (str, int, float))
+
+def _check_ids(items, section, kind, required, service_name, issues):
+    """Check the entries of a list section and return the set of their IDs."""
+    ids = set()
+    if not isinstance(items, list):
+        issues.append(((section,), f"'{section}' in service {service_name} must be a list", "error"))
+        return ids
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or any(field not in item for field in required):
+            issues.append(((section, index), f"Invalid {kind} definition in service {service_name}: {item}", "error"))
+            continue
+        if not _is_scalar(item["id"]):
+            issues.append(((section, index, "id"), f"Invalid {kind} ID {item['id']!r} in service {service_name}: must be a string", "error"))
+            continue
+        if item["id"] in ids:
+            issues.append(((section, index, "id"), f"Duplicate {kind} ID '{item['id']}' in service {service_name}", "error"))
+        ids.add(item["id"])
+    return ids
+
+def check_service(service):
+    """Check a single service and return every problem as (path, message, severity) tuples."""
+    issues = []
+    if not isinstance(service, dict):
+        return [((), f"Service definition must be a mapping, got: {service}", "error")]
+
+    name = service.get("name", "unknown")
     required_fields = ["name", "uri", "default_upstream", "matches", "rules", "upstreams"]
     for field in required_fields:
         if field not in service:
-            raise ConfigValidationError(f"Missing required field '{field}' in service {service.get('name', 'unknown')}")
+            issues.append(((), f"Missing required field '{field}' in service {name}", "error"))
+    for field in ("name", "uri"):
+        if field in service and not isinstance(service[field], str):
+            issues.append(((field,), f"Field '{field}' of service {name} must be a string, got: {service[field]!r}", "error"))
 
     # Validate matches
-    match_ids = set()
-    for match in service["matches"]:
-        if "id" not in match or "header_name" not in match or "operator" not in match or "value" not in match:
-            raise ConfigValidationError(f"Invalid match definition in service {service['name']}: {match}")
-        if match["id"] in match_ids:
-            raise ConfigValidationError(f"Duplicate match ID '{match['id']}' in service {service['name']}")
-        match_ids.add(match["id"])
+    matches = service.get("matches", [])
+    match_ids = _check_ids(matches, "matches", "match", ("id", "header_name", "operator", "value"), name, issues)
+    for index, match in enumerate(matches if isinstance(matches, list) else []):
+        if not isinstance(match, dict) or "operator" not in match or "value" not in match:
+            continue
+        if "header_name" in match and not isinstance(match["header_name"], str):
+            issues.append((("matches", index, "header_name"), f"Header name of match '{match.get('id')}' in service {name} must be a string, got: {match['header_name']!r}", "error"))
+        if match["operator"] == "~=":
+            try:
+                re.compile(str(match["value"]))
+            except re.error as e:
+                issues.append((("matches", index, "value"), f"Invalid regex '{match['value']}' in match '{match.get('id')}' of service {name}: {e}", "error"))
+                continue
+            risk = regex_risk(str(match["value"]))
+            if risk:
+                issues.append((("matches", index, "value"), f"Regex '{match['value']}' in match '{match.get('id')}' of service {name} is prone to catastrophic backtracking ({risk})", "error"))
+        elif match["operator"] != "==":
+            issues.append((("matches", index, "operator"), f"Unsupported operator '{match['operator']}' in match '{match.get('id')}' of service {name}", "error"))
 
-    # Validate rules
-    rule_ids = set()
-    for rule in service["rules"]:
-        if "id" not in rule or "matches" not in rule or "upstream_id" not in rule:
-            raise ConfigValidationError(f"Invalid rule definition in service {service['name']}: {rule}")
-        if rule["id"] in rule_ids:
-            raise ConfigValidationError(f"Duplicate rule ID '{rule['id']}' in service {service['name']}")
-        rule_ids.add(rule["id"])
+    # Validate upstreams
+    upstream_ids = _check_ids(service.get("upstreams", []), "upstreams", "upstream", ("id", "target", "port"), name, issues)
 
+    # Validate rules
+    rules = service.get("rules", [])
+    _check_ids(rules, "rules", "rule", ("id", "matches", "upstream_id"), name, issues)
+    for index, rule in enumerate(rules if isinstance(rules, list) else []):
+        if not isinstance(rule, dict) or "id" not in rule or "matches" not in rule or "upstream_id" not in rule:
+            continue
+        if not isinstance(rule["matches"] or [], list):
+            issues.append((("rules", index, "matches"), f"'matches' of rule '{rule['id']}' in service {name} must be a list of match IDs", "error"))
+            continue
         # Ensure all referenced matches exist
-        for match_id in rule["matches"]:
-            if match_id not in match_ids:
-                raise ConfigValidationError(f"Rule '{rule['id']}' in service {service['name']} references undefined match ID '{match_id}'")
-
-    # Validate upstreams
-    upstream_ids = set()
-    for upstream in service["upstreams"]:
-        if "id" not in upstream or "target" not in upstream or "port" not in upstream:
-            raise ConfigValidationError(f"Invalid upstream definition in service {service['name']}: {upstream}")
-        if upstream["id"] in upstream_ids:
-            raise ConfigValidationError(f"Duplicate upstream ID '{upstream['id']}' in service {service['name']}")
-        upstream_ids.add(upstream["id"])
+        for match_id in rule["matches"] or []:
+            if not _is_scalar(match_id) or match_id not in match_ids:
+                issues.append((("rules", index, "matches"), f"Rule '{rule['id']}' in service {name} references undefined match ID '{match_id}'", "error"))
+        if "upstreams" in service and (not _is_scalar(rule["upstream_id"]) or rule["upstream_id"] not in upstream_ids):
+            issues.append((("rules", index, "upstream_id"), f"Rule '{rule['id']}' in service {name} references undefined upstream '{rule['upstream_id']}'", "error"))
 
     # Ensure default_upstream exists in upstreams
-    if service["default_upstream"] not in upstream_ids:
-        raise ConfigValidationError(f"Default upstream '{service['default_upstream']}' in service {service['name']} does not exist in upstreams")
+    if "default_upstream" in service and "upstreams" in service and (not _is_scalar(service["default_upstream"]) or service["default_upstream"] not in upstream_ids):
+        issues.append((("default_upstream",), f"Default upstream '{service['default_upstream']}' in service {name} does not exist in upstreams", "error"))
 
     # Validate rollstrategy
     rollstrategy = service.get("rollstrategy")
-    if rollstrategy:
-        if "groups" in rollstrategy:
-            total_weight = 0
-            expected_ids = [chr(i) for i in range(65, 65 + len(rollstrategy["groups"]))]  # Generate sequential IDs: A, B, C, ...
-            actual_ids = [group["id"] for group in rollstrategy["groups"]]
-
-            if actual_ids != expected_ids:
-                raise ConfigValidationError(f"Rollstrategy group IDs in service {service['name']} are not in order. Expected: {expected_ids}, Found: {actual_ids}")
-
-            for group in rollstrategy["groups"]:
-                if "id" not in group or "upstream_id" not in group or "weight" not in group:
-                    raise ConfigValidationError(f"Invalid group in rollstrategy for service {service['name']}: {group}")
-                if group["upstream_id"] not in upstream_ids:
-                    raise ConfigValidationError(f"Group upstream_id '{group['upstream_id']}' in rollstrategy for service {service['name']} does not exist in upstreams")
-                total_weight += group["weight"]
-            if total_weight != 100:
-                raise ConfigValidationError(f"Total weight of rollstrategy in service {service['name']} must equal 100, but got {total_weight}")
-        else:
-            # If rollstrategy exists but no groups, default_upstream should be valid
-            if service["default_upstream"] not in upstream_ids:
-                raise ConfigValidationError(f"Rollstrategy in service {service['name']} does not define groups, and default_upstream '{service['default_upstream']}' is invalid")
+    if rollstrategy is not None and not isinstance(rollstrategy, dict):
+        issues.append((("rollstrategy",), f"Rollstrategy of service {name} must be a mapping with 'groups', got: {rollstrategy!r}", "error"))
+    elif rollstrategy and isinstance(rollstrategy, dict) and not isinstance(rollstrategy.get("groups") or [], list):
+        issues.append((("rollstrategy", "groups"), f"Rollstrategy groups in service {name} must be a list", "error"))
+    elif rollstrategy and isinstance(rollstrategy, dict) and "groups" in rollstrategy:
+        groups = rollstrategy["groups"] or []
+        total_weight = 0
+        for index, group in enumerate(groups):
+            if not isinstance(group, dict) or "id" not in group or "upstream_id" not in group or "weight" not in group:
+                issues.append((("rollstrategy", "groups", index), f"Invalid group in rollstrategy for service {name}: {group}", "error"))
+                continue
+            if not _is_scalar(group["upstream_id"]) or group["upstream_id"] not in upstream_ids:
+                issues.append((("rollstrategy", "groups", index, "upstream_id"), f"Group upstream_id '{group['upstream_id']}' in rollstrategy for service {name} does not exist in upstreams", "error"))
+            weight = group["weight"]
+            if not isinstance(weight, (int, float)) or isinstance(weight, bool) or weight < 0:
+                issues.append((("rollstrategy", "groups", index, "weight"), f"Weight of group '{group['id']}' in rollstrategy for service {name} must be a non-negative number, got: {weight!r}", "error"))
+                continue
+            total_weight += weight
+
+        expected_ids = [chr(i) for i in range(65, 65 + len(groups))]  # Generate sequential IDs: A, B, C, ...
+        actual_ids = [group.get("id") for group in groups if isinstance(group, dict)]
+        if actual_ids != expected_ids:
+            issues.append((("rollstrategy", "groups"), f"Rollstrategy group IDs in service {name} are not in order. Expected: {expected_ids}, Found: {actual_ids}", "error"))
+        if total_weight != 100:
+            issues.append((("rollstrategy", "groups"), f"Total weight of rollstrategy in service {name} must equal 100, but got {total_weight}", "error"))
+
+    # How rules interact only makes sense once the structure is sound.
+    if not any(severity == "error" for _, _, severity in issues):
+        issues.extend(analyze_rules(service))
+    return issues
+
+class ServiceCheckCache:
+    """LRU cache of check_service results keyed by service content hash."""
+
+    def __init__(self, max_entries=20000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
 
-def validate_config(config):
-    """Validate the entire configuration file."""
-    if "services" not in config:
-        raise ConfigValidationError("Missing 'services' section in configuration")
+    def check(self, service):
+        """Return check_service(service), reusing the result for unchanged services."""
+        if not isinstance(service, dict):
+            return check_service(service)
+        digest = service_digest(service)
+        with self._lock:
+            issues = self._entries.get(digest)
+            if issues is not None:
+                self._entries.move_to_end(digest)
+                return issues
+        issues = tuple(check_service(service))
+        with self._lock:
+            self._entries[digest] = issues
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return issues
+
+    def clear(self):
+        """Forget every cached result."""
+        with self._lock:
+            self._entries.clear()
+
+service_check_cache = ServiceCheckCache()
+
+def check_services_together(services, issues):
+    """Cross-service checks: duplicate names, duplicate and nested URI prefixes."""
+    names = {}
+    prefixes = {}
+    for index, service in enumerate(services):
+        if not isinstance(service, dict):
+            continue
+        name = service.get("name")
+        if _is_scalar(name):  # Other names are reported by check_service
+            if name in names:
+                issues.append((("services", index, "name"), f"Duplicate service name '{name}'", "error"))
+            else:
+                names[name] = index
+        if isinstance(service.get("uri"), str):
+            segments = tuple(split_uri(service["uri"]))
+            if segments in prefixes:
+                other = prefixes[segments]
+                issues.append((("services", index, "uri"), f"URI '{service['uri']}' of service {name} is already used by service {services[other].get('name')}", "error"))
+            else:
+                prefixes[segments] = index
+
+    # A prefix nested inside another service's prefix is legal (longest
+    # prefix wins) but easy to introduce by accident, so warn about it.
+    for segments, index in prefixes.items():
+        for depth in range(len(segments)):
+            parent = prefixes.get(segments[:depth])
+            if parent is not None:
+                issues.append((("services", index, "uri"), f"URI '{services[index]['uri']}' of service {services[index].get('name')} overlaps URI '{services[parent]['uri']}' of service {services[parent].get('name')}", "warning"))
+
+def line_for(path, lines):
+    """Return the YAML line of path, or of its nearest ancestor that has one."""
+    while path:
+        if path in lines:
+            return lines[path]
+        path = path[:-1]
+    return lines.get(())
+
+def collect_issues(config, lines=None, cache=service_check_cache):
+    """Validate the whole configuration in one pass and return every ValidationIssue found."""
+    lines = lines or {}
+    if not isinstance(config, dict) or "services" not in config:
+        return [ValidationIssue((), "Missing 'services' section in configuration", "error", line_for((), lines))]
+    services = config["services"]
+    if not isinstance(services, list):
+        return [ValidationIssue(("services",), "'services' must be a list", "error", line_for(("services",), lines))]
+
+    raw = []
+    with timed("validate", phase="services"):
+        for index, service in enumerate(services):
+            raw.extend((("services", index) + path, message, severity) for path, message, severity in cache.check(service))
+    with timed("validate", phase="cross_service"):
+        check_services_together(services, raw)
+    return [ValidationIssue(path, message, severity, line_for(path, lines)) for path, message, severity in raw]
+
+def validate_service(service):
+    """Validate a single service configuration."""
+    for path, message, severity in check_service(service):
+        if severity == "error":
+            raise ConfigValidationError(message, [ValidationIssue(path, message, severity, None)])
+
+def raise_for_issues(issues):
+    """Raise a ConfigValidationError listing every error among issues, if there is any."""
+    errors = [issue for issue in issues if issue.severity == "error"]
+    if errors:
+        if len(errors) == 1:
+            message = format_issue(errors[0])
+        else:
+            message = f"{len(errors)} errors found:\n" + "\n".join(format_issue(issue) for issue in errors)
+        raise ConfigValidationError(message, issues)
 
-    for service in config["services"]:
-        validate_service(service)
+def validate_config(config, lines=None):
+    """Validate the entire configuration file, reporting every error at once."""
+    issues = collect_issues(config, lines)
+    raise_for_issues(issues)
+    return issues
 
 def load_and_validate_config(file_path: str):
     """Load and validate the configuration."""
     config = load_yaml(file_path)
     validate_config(config)
-    return config
\ No newline at end of file
+    return config
@@ -0,0 +1,261 @@
+import os
+import threading
+import time
+from collections import namedtuple
+
+from config_index import get_config_index, is_config_dir
+from config_loader import CONFIG_DIRECTORY
+from config_validator import ConfigValidationError, ValidationIssue, collect_issues, parse_yaml_with_lines
+from perf_metrics import timed
+
+try:
+    from inotify_simple import INotify, flags  # type: ignore
+except ImportError:  # Optional; fall back to polling
+    INotify = None
+
+# Wait for this long without further changes before revalidating, so an
+# editor's save (or a git checkout) is validated once, not per write.
+DEBOUNCE_SECONDS = 0.5
+
+# Scan interval of the polling fallback.
+POLL_INTERVAL = 2.0
+
+# Badge states shown per config source.
+VALID = "valid"
+INVALID = "invalid"
+STALE = "stale"
+
+# Validation status of one config source (a YAML file or a split config directory).
+#   state:      VALID, INVALID or STALE (changed on disk, revalidation pending)
+#   errors:     number of errors found by the last validation
+#   warnings:   number of warnings found by the last validation
+#   issues:     ValidationIssues of the last validation
+#   checked_at: time.time() of the last validation, None before the first one
+FileStatus = namedtuple("FileStatus", ["state", "errors", "warnings", "issues", "checked_at"])
+
+
+class ConfigStatusStore:
+    """Thread-safe store of the latest validation status per config source."""
+
+    def __init__(self):
+        self._statuses = {}
+        self._lock = threading.Lock()
+
+    def get(self, source):
+        """Return the FileStatus of a source, or None if it was never seen."""
+        with self._lock:
+            return self._statuses.get(source)
+
+    def all(self):
+        """Return {source: FileStatus} sorted by source."""
+        with self._lock:
+            return dict(sorted(self._statuses.items()))
+
+    def mark_stale(self, source):
+        """Flag a source as changed, keeping the result of its last validation."""
+        with self._lock:
+            status = self._statuses.get(source) or FileStatus(STALE, 0, 0, [], None)
+            self._statuses[source] = status._replace(state=STALE)
+
+    def set_issues(self, source, issues):
+        """Store the result of validating a source."""
+        errors = sum(1 for issue in issues if issue.severity == "error")
+        status = FileStatus(INVALID if errors else VALID, errors, len(issues) - errors, issues, time.time())
+        with self._lock:
+            self._statuses[source] = status
+
+    def remove(self, source):
+        with self._lock:
+            self._statuses.pop(source, None)
+
+
+def source_of(directory, path):
+    """Return the config source a changed path belongs to, or None if it is not config.
+
+    Top-level YAML files are their own source; anything inside a
+    subdirectory belongs to that directory ('name/'). Hidden files, such as
+    snapshots and the temporary files of atomic writes, are ignored.
+    """
+    relative = os.path.relpath(path, directory)
+    parts = relative.split(os.sep)
+    if relative.startswith("..") or any(part.startswith(".") for part in parts):
+        return None
+    if len(parts) == 1:
+        if os.path.isdir(path):
+            return parts[0] + "/"
+        return parts[0] if parts[0].endswith((".yaml", ".yml")) else None
+    return parts[0] + "/"
+
+
+def validate_source(directory, source):
+    """Validate one config source and return its ValidationIssues, or None if it no longer exists.
+
+    Services are checked through the shared service_check_cache and split
+    directories through their ConfigIndex, so only services and files that
+    actually changed are validated again.
+    """
+    path = os.path.join(directory, source)
+    if source.endswith("/"):
+        if not is_config_dir(path):
+            return None
+        index = get_config_index(path)
+        try:
+            index.refresh()
+        except ConfigValidationError as e:
+            return [ValidationIssue((), str(e), "error", None)]
+        return list(index.issues)
+
+    try:
+        with open(path, "rb") as f:
+            content = f.read()
+    except FileNotFoundError:
+        return None
+    try:
+        config, lines = parse_yaml_with_lines(content)
+    except ConfigValidationError as e:
+        return [ValidationIssue((), str(e), "error", None)]
+    return collect_issues(config, lines)
+
+
+def _scan(directory):
+    """Return {path: (mtime_ns, size)} of every config file below directory."""
+    signatures = {}
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [name for name in dirs if not name.startswith(".")]
+        for name in files:
+            if name.endswith((".yaml", ".yml")) and not name.startswith("."):
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                signatures[path] = (stat.st_mtime_ns, stat.st_size)
+    return signatures
+
+
+class ConfigWatcher:
+    """Background thread that revalidates config sources when they change.
+
+    Uses inotify when ``inotify_simple`` is installed and polls file stats
+    otherwise. Changed sources are marked stale right away and validated
+    once the directory has been quiet for ``debounce`` seconds.
+    """
+
+    def __init__(self, directory=CONFIG_DIRECTORY, store=None, debounce=DEBOUNCE_SECONDS, poll_interval=POLL_INTERVAL):
+        self.directory = os.path.abspath(directory)
+        self.store = store or ConfigStatusStore()
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.backend = "inotify" if INotify is not None else "polling"
+        self._pending = set()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Validate every source once, then keep watching in a daemon thread."""
+        if self._thread is None:
+            for source in self.sources():
+                self.store.mark_stale(source)
+                self._pending.add(source)
+            self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def sources(self):
+        """List the config sources of the watched directory."""
+        sources = []
+        for name in sorted(os.listdir(self.directory)):
+            source = source_of(self.directory, os.path.join(self.directory, name))
+            if source and (not source.endswith("/") or is_config_dir(os.path.join(self.directory, name))):
+                sources.append(source)
+        return sources
+
+    def _changed(self, paths):
+        for path in paths:
+            source = source_of(self.directory, path)
+            if source is not None:
+                self.store.mark_stale(source)
+                self._pending.add(source)
+
+    def _flush(self):
+        pending, self._pending = self._pending, set()
+        for source in sorted(pending):
+            with timed("watcher_validate"):
+                try:
+                    issues = validate_source(self.directory, source)
+                except Exception as e:  # Keep watching; report the crash as the source's status
+                    issues = [ValidationIssue((), f"Validation crashed: {type(e).__name__}: {e}", "error", None)]
+            if issues is None:
+                self.store.remove(source)
+            else:
+                self.store.set_issues(source, issues)
+
+    def _run(self):
+        if self.backend == "inotify":
+            self._run_inotify()
+        else:
+            self._run_polling()
+
+    def _run_polling(self):
+        signatures = _scan(self.directory)
+        last_change = 0.0
+        while not self._stop.is_set():
+            if self._pending and time.monotonic() - last_change >= self.debounce:
+                self._flush()
+            self._stop.wait(min(self.poll_interval, self.debounce) if self._pending else self.poll_interval)
+            current = _scan(self.directory)
+            changed = {path for path in current.keys() | signatures.keys() if current.get(path) != signatures.get(path)}
+            if changed:
+                self._changed(changed)
+                last_change = time.monotonic()
+            signatures = current
+
+    def _run_inotify(self):
+        mask = flags.CLOSE_WRITE | flags.CREATE | flags.DELETE | flags.MOVED_TO | flags.MOVED_FROM | flags.MODIFY
+        watches = {}
+        with INotify() as inotify:
+            def watch(path):
+                for root, dirs, _ in os.walk(path):
+                    dirs[:] = [name for name in dirs if not name.startswith(".")]
+                    watches[inotify.add_watch(root, mask)] = root
+
+            watch(self.directory)
+            timeout = 0
+            while not self._stop.is_set():
+                events = inotify.read(timeout=int(timeout * 1000))
+                if not events:
+                    if self._pending:
+                        self._flush()
+                    timeout = self.poll_interval
+                    continue
+                paths = []
+                for event in events:
+                    root = watches.get(event.wd)
+                    if root is None or not event.name:
+                        continue
+                    path = os.path.join(root, event.name)
+                    if event.mask & flags.ISDIR and event.mask & (flags.CREATE | flags.MOVED_TO):
+                        watch(path)
+                    paths.append(path)
+                self._changed(paths)
+                timeout = self.debounce
+
+
+status_store = ConfigStatusStore()
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def start_watcher(directory=CONFIG_DIRECTORY):
+    """Start the process-wide watcher (once) and return it."""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = ConfigWatcher(directory, status_store).start()
+        return _watcher
@@ -0,0 +1,121 @@
+import os
+import tempfile
+
+import yaml
+
+from config_validator import SafeLoader, ConfigValidationError, validate_config
+
+# Fields written first, in this order, so saved services read like the
+# hand-written ones in config/input.yaml.
+SERVICE_FIELD_ORDER = ("name", "admin_state", "uri", "default_upstream", "matches", "rules", "upstreams", "rollstrategy")
+
+
+class _IndentedDumper(yaml.SafeDumper):
+    """Dumper that indents block sequences under their key, like the config files do."""
+
+    def increase_indent(self, flow=False, indentless=False):
+        return super().increase_indent(flow, False)
+
+
+def dump_service(service, indent=0):
+    """Dump a service as a YAML block mapping, continuation lines indented by `indent` spaces."""
+    ordered = {field: service[field] for field in SERVICE_FIELD_ORDER if field in service}
+    ordered.update((field, value) for field, value in service.items() if field not in ordered)
+    text = yaml.dump(ordered, Dumper=_IndentedDumper, default_flow_style=False, sort_keys=False, allow_unicode=True)
+    lines = text.rstrip("\n").split("\n")
+    return "\n".join([lines[0]] + [" " * indent + line for line in lines[1:]])
+
+
+def atomic_write(file_path: str, content):
+    """Write content (str or bytes) next to file_path and rename it into place, keeping the file mode."""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(file_path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb" if isinstance(content, bytes) else "w") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(file_path):
+            os.chmod(tmp_path, os.stat(file_path).st_mode & 0o7777)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _offset(line_starts, mark):
+    return line_starts[mark.line] + mark.column if mark.line < len(line_starts) else line_starts[-1]
+
+
+def _content_end(text, line_starts, node):
+    """Return the offset just past the last value of a block node.
+
+    A block node's own end mark is the start of the next token, so comments
+    and blank lines after its content would be counted as part of it.
+    """
+    while isinstance(node, (yaml.MappingNode, yaml.SequenceNode)) and node.value and not node.flow_style:
+        node = node.value[-1][1] if isinstance(node, yaml.MappingNode) else node.value[-1]
+    end = _offset(line_starts, node.end_mark)
+    if node.end_mark.column == 0:
+        # Block scalars end after their line breaks; keep those in the file.
+        end = len(text[:end].rstrip())
+    return end
+
+
+def save_service(file_path: str, service, original=None):
+    """Replace one service in a config file in place and write it atomically.
+
+    Only the text of that service's entry, up to the end of its last line,
+    is rewritten; every other byte of the file, including the comments and
+    blank lines around it, is kept. When ``original`` (the service as it was
+    loaded) is given, the save is refused if someone else changed that
+    service on disk in the meantime. The resulting config is validated before it is written.
+    """
+    name = (original or service)["name"]
+    with open(file_path, "r") as f:
+        text = f.read()
+
+    loader = SafeLoader(text)
+    try:
+        root = loader.get_single_node()
+        config = loader.construct_document(root) if root is not None else None
+    except yaml.YAMLError as e:
+        raise ConfigValidationError(f"YAML Parsing Error: {str(e)}")
+    finally:
+        loader.dispose()
+
+    services_node = None
+    if isinstance(root, yaml.MappingNode):
+        services_node = next((value for key, value in root.value if key.value == "services"), None)
+    if not isinstance(config, dict) or not isinstance(services_node, yaml.SequenceNode):
+        raise ConfigValidationError(f"Missing 'services' section in {file_path}")
+
+    index = next((i for i, s in enumerate(config["services"]) if isinstance(s, dict) and s.get("name") == name), None)
+    if index is None:
+        raise ConfigValidationError(f"Service {name} not found in {file_path}")
+    if original is not None and config["services"][index] != original:
+        raise ConfigValidationError(f"Service {name} was changed in {file_path} by someone else; reload and edit again")
+
+    config["services"][index] = service
+    validate_config(config)
+
+    node = services_node.value[index]
+    if isinstance(node, yaml.MappingNode) and not node.flow_style:
+        line_starts = [0]
+        for line in text.split("\n"):
+            line_starts.append(line_starts[-1] + len(line) + 1)
+        start = _offset(line_starts, node.start_mark)
+        end = _content_end(text, line_starts, node)
+        line_end = text.find("\n", end)
+        if line_end == -1:
+            line_end = len(text)
+        # Keep a comment at the end of the last line; everything after that line is untouched.
+        comment = text[end:line_end].rstrip()
+        content = text[:start] + dump_service(service, node.start_mark.column) + comment + text[line_end:]
+    else:
+        # Flow-style entries cannot be spliced safely; rewrite the document.
+        content = yaml.dump(config, Dumper=_IndentedDumper, default_flow_style=False, sort_keys=False, allow_unicode=True)
+
+    atomic_write(file_path, content)
+    return config
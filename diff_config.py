@@ -1,75 +1,9 @@
+import datetime
 import os
 import streamlit as st # type: ignore
-from config_loader import load_and_validate_config, ConfigValidationError
-import yaml
-from deepdiff import DeepDiff # type: ignore
-
-def list_yaml_files(directory):
-    """List all YAML files in a given directory."""
-    return [f for f in os.listdir(directory) if f.endswith('.yaml')]
-
-def diff_yaml_files(file1, file2):
-    """Diff two YAML files and return the differences."""
-    try:
-        with open(file1, 'r') as f1, open(file2, 'r') as f2:
-            yaml1 = yaml.safe_load(f1)
-            yaml2 = yaml.safe_load(f2)
-            diff = DeepDiff(yaml1, yaml2, ignore_order=True, report_repetition=True)
-            return diff
-    except Exception as e:
-        raise ConfigValidationError(f"Error diffing files: {str(e)}")
-
-def categorize_diffs_by_object_and_type(diff):
-    """Organize differences by object types and categorize them as added, removed, or changed."""
-    categorized = {
-        "Added": {},
-        "Removed": {},
-        "Changed": {}
-    }
-
-    if 'dictionary_item_added' in diff:
-        for item in diff['dictionary_item_added']:
-            path = str(item)
-            category = extract_object_type(path)
-            if category not in categorized["Added"]:
-                categorized["Added"][category] = []
-            categorized["Added"][category].append(path)
-
-    if 'dictionary_item_removed' in diff:
-        for item in diff['dictionary_item_removed']:
-            path = str(item)
-            category = extract_object_type(path)
-            if category not in categorized["Removed"]:
-                categorized["Removed"][category] = []
-            categorized["Removed"][category].append(path)
-
-    if 'values_changed' in diff:
-        for key, value in diff['values_changed'].items():
-            path = str(key)
-            category = extract_object_type(path)
-            if category not in categorized["Changed"]:
-                categorized["Changed"][category] = []
-            categorized["Changed"][category].append({
-                "property": path.split(".")[-1],  # Extract only the last part of the path
-                "old_value": value['old_value'],
-                "new_value": value['new_value']
-            })
-
-    return categorized
-
-def extract_object_type(path):
-    """Extract the object type (e.g., services, matches, rollstrategy) from the path."""
-    if "services" in path:
-        return "services"
-    if "matches" in path:
-        return "matches"
-    if "rollstrategy" in path:
-        return "rollstrategy"
-    if "rules" in path:
-        return "rules"
-    if "upstreams" in path:
-        return "upstreams"
-    return "unknown"
+from config_diff import categorize_diff_records, diff_yaml_files
+from config_loader import CONFIG_DIRECTORY, list_config_sources
+from config_validator import ConfigValidationError
 
 def format_diff_for_humans(categorized):
     """Create a human-readable format of the categorized differences."""
@@ -81,17 +15,142 @@ def format_diff_for_humans(categorized):
             lines.append(f"- {obj_type.capitalize()}:")
             for change in changes:
                 if isinstance(change, dict):  # For changed values
-                    lines.append(f"  - Property `{change['property']}`: {change['old_value']} -> {change['new_value']}")
+                    lines.append(f"  - {change['object']}: property `{change['property']}`: {change['old_value']} -> {change['new_value']}")
                 else:
                     lines.append(f"  - {change}")
 
     return "\n".join(lines)
 
+def show_diff(diff):
+    """Show DiffRecords as readable text and as JSON."""
+    if not diff:
+        st.success("No differences.")
+        return
+    st.warning("Differences found:")
+
+    # Categorize and display differences
+    categorized = categorize_diff_records(diff)
+    human_readable_diff = format_diff_for_humans(categorized)
+    st.text_area("Human-Readable Differences by Object and Type:", human_readable_diff, height=300)
+
+    # Display JSON output for API use
+    st.subheader("API JSON Output by Object and Type")
+    st.json(categorized)
+
+def history_page(config_directory):
+    """Diff or roll back recorded revisions of one config file."""
+    from config_history import history  # Only this mode needs the history store
+    yaml_files = [f for f in list_config_sources(config_directory) if not f.endswith("/")]
+    if not yaml_files:
+        st.error("No YAML files found in the /config directory.")
+        return
+
+    selected_file = st.selectbox("Config file:", yaml_files, key="history_file")
+    file_path = os.path.join(config_directory, selected_file)
+    if st.button("Record Current Version"):
+        try:
+            history.record_file(file_path, "Recorded manually")
+        except ConfigValidationError as e:
+            st.error(f"Could not record {selected_file}: {e}")
+
+    revisions = history.revisions(file_path)[::-1]
+    if not revisions:
+        st.info("No revisions recorded yet. Saving a service or recording the current version starts the history.")
+        return
+
+    st.dataframe([{
+        "revision": entry.revision[:10],
+        "recorded": datetime.datetime.fromtimestamp(entry.timestamp).strftime("%Y-%m-%d %H:%M:%S"),
+        "message": entry.message,
+        "services": entry.services,
+        "changed": ", ".join(entry.changed),
+    } for entry in revisions], use_container_width=True)
+
+    labels = {entry.revision: f"{entry.revision[:10]} {entry.message}" for entry in revisions}
+    col1, col2 = st.columns(2)
+    with col1:
+        old = st.selectbox("Old revision:", list(labels), index=min(1, len(labels) - 1), format_func=labels.get)
+    with col2:
+        new = st.selectbox("New revision:", list(labels), format_func=labels.get)
+
+    col1, col2 = st.columns(2)
+    if col1.button("Compare Revisions"):
+        try:
+            show_diff(history.diff(old, new))
+        except ConfigValidationError as e:
+            st.error("Error comparing revisions.")
+            st.code(str(e))
+    if col2.button(f"Roll Back to {old[:10]}"):
+        st.session_state["history_rollback"] = (file_path, old)
+    if st.session_state.get("history_rollback") == (file_path, old):
+        st.warning(f"Overwrite {selected_file} with revision {old[:10]}? Its current content is recorded first, so the rollback can be undone.")
+        col1, col2 = st.columns(2)
+        if col1.button("Confirm Roll Back", type="primary"):
+            st.session_state.pop("history_rollback")
+            try:
+                history.rollback(file_path, old)
+                st.success(f"{selected_file} rolled back to {old[:10]}.")
+            except ConfigValidationError as e:
+                st.error("Rollback failed.")
+                st.code(str(e))
+        if col2.button("Cancel"):
+            st.session_state.pop("history_rollback")
+            st.rerun()
+
+def traffic_page(config_directory):
+    """Replay a request log through two configs and show which requests change upstream."""
+    from behavior_diff import behavior_diff  # Pulls in routing and multiprocessing; only this mode needs them
+    sources = list_config_sources(config_directory)
+    if not sources:
+        st.error("No YAML files found in the /config directory.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        old = st.selectbox("Current config:", sources, key="traffic_old")
+    with col2:
+        new = st.selectbox("Proposed config:", sources, key="traffic_new")
+    log_path = st.text_input("Request log (JSONL with uri and headers per line):", "requests.jsonl")
+
+    if st.button("Replay Requests"):
+        if not os.path.isfile(log_path):
+            st.error(f"Request log not found: {log_path}")
+            return
+        try:
+            with st.spinner("Replaying requests through both configs..."):
+                summary = behavior_diff(log_path, os.path.join(config_directory, old), os.path.join(config_directory, new)).summary()
+        except ConfigValidationError as e:
+            st.error("Error loading configurations.")
+            st.code(str(e))
+            return
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Requests", summary["requests"])
+        col2.metric("Moved", summary["moved"])
+        col3.metric("Compared", summary["compared"])
+        col4.metric("Skipped (identical services)", summary["skipped_identical"])
+        st.caption(f"{summary['unrouted']} requests are served by neither config; "
+                   f"{summary['rule_or_group_changed']} keep their upstream but hit another rule or group.")
+        if not summary["moved"]:
+            st.success("No request changes upstream.")
+            return
+        for name, stats in summary["services"].items():
+            with st.expander(f"{name}: {stats['moved']} of {stats['requests']} requests move"):
+                st.json(stats)
+
 def diff_page():
     st.title("Configuration Diff Tool")
 
-    config_directory = "./config"
-    yaml_files = list_yaml_files(config_directory)
+    config_directory = CONFIG_DIRECTORY
+    mode = st.radio("Compare:", ["Files", "History", "Traffic"], horizontal=True)
+    if mode == "History":
+        history_page(config_directory)
+        return
+    if mode == "Traffic":
+        traffic_page(config_directory)
+        return
+
+    yaml_files = list_config_sources(config_directory)
 
     if not yaml_files:
         st.error("No YAML files found in the /config directory.")
@@ -111,20 +170,7 @@ def diff_page():
         file2_path = os.path.join(config_directory, file2)
 
         try:
-            diff = diff_yaml_files(file1_path, file2_path)
-            if not diff:
-                st.success("The files are identical.")
-            else:
-                st.warning("Differences found between the files:")
-
-                # Categorize and display differences
-                categorized = categorize_diffs_by_object_and_type(diff)
-                human_readable_diff = format_diff_for_humans(categorized)
-                st.text_area("Human-Readable Differences by Object and Type:", human_readable_diff, height=300)
-
-                # Display JSON output for API use
-                st.subheader("API JSON Output by Object and Type")
-                st.json(categorized)
+            show_diff(diff_yaml_files(file1_path, file2_path))
         except ConfigValidationError as e:
             st.error("Error comparing files.")
             st.code(str(e))
@@ -1,6 +1,6 @@
-import extra_streamlit_components as stx
-
+import extra_streamlit_components as stx # type: ignore
+import streamlit as st # type: ignore
 
 
 val = stx.stepper_bar(steps=["Ready", "Get Set", "Go"])
-st.info(f"Phase #{val}")
\ No newline at end of file
+st.info(f"Phase #{val}")
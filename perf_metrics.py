@@ -0,0 +1,150 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from functools import wraps
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# When set, the Prometheus text file is rewritten after every page render so a
+# node_exporter textfile collector can scrape it.
+METRICS_FILE = os.environ.get("DISPATCHER_METRICS_FILE")
+
+
+class MetricsRegistry:
+    """In-process registry of operation timings and memory use.
+
+    Each operation (optionally qualified by labels such as ``phase`` or
+    ``page``) keeps a count, total/max/last duration and, while tracemalloc
+    is tracing, the net bytes allocated per call.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation, seconds, alloc_bytes=None, **labels):
+        """Record one timed call of an operation."""
+        key = (operation, tuple(sorted(labels.items())))
+        with self._lock:
+            stats = self._metrics.get(key)
+            if stats is None:
+                stats = self._metrics[key] = {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "last_seconds": 0.0, "max_alloc_bytes": None}
+            stats["count"] += 1
+            stats["total_seconds"] += seconds
+            stats["last_seconds"] = seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            if alloc_bytes is not None:
+                stats["max_alloc_bytes"] = max(stats["max_alloc_bytes"] or 0, alloc_bytes)
+
+    def timed(self, operation, **labels):
+        """Return a context manager / decorator that records the wrapped call."""
+        return _Timer(self, operation, labels)
+
+    def snapshot(self):
+        """Return the current metrics as a list of dicts, slowest total first."""
+        with self._lock:
+            rows = [
+                {"operation": operation, **dict(labels), **stats, "mean_seconds": stats["total_seconds"] / stats["count"]}
+                for (operation, labels), stats in self._metrics.items()
+            ]
+        return sorted(rows, key=lambda row: row["total_seconds"], reverse=True)
+
+    def reset(self):
+        """Drop all recorded metrics."""
+        with self._lock:
+            self._metrics.clear()
+
+    def prometheus_text(self):
+        """Render the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            items = [(operation, labels, dict(stats)) for (operation, labels), stats in self._metrics.items()]
+
+        def selector(operation, labels):
+            pairs = [("operation", operation)] + list(labels)
+            return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+        lines = [
+            "# HELP dispatcher_operation_seconds Time spent in instrumented operations.",
+            "# TYPE dispatcher_operation_seconds summary",
+        ]
+        for operation, labels, stats in items:
+            lines.append(f"dispatcher_operation_seconds_count{selector(operation, labels)} {stats['count']}")
+            lines.append(f"dispatcher_operation_seconds_sum{selector(operation, labels)} {stats['total_seconds']:.9f}")
+        lines += [
+            "# HELP dispatcher_operation_max_seconds Slowest single call of an operation.",
+            "# TYPE dispatcher_operation_max_seconds gauge",
+        ]
+        for operation, labels, stats in items:
+            lines.append(f"dispatcher_operation_max_seconds{selector(operation, labels)} {stats['max_seconds']:.9f}")
+        lines += [
+            "# HELP dispatcher_operation_max_alloc_bytes Largest net allocation of a single call (tracemalloc).",
+            "# TYPE dispatcher_operation_max_alloc_bytes gauge",
+        ]
+        for operation, labels, stats in items:
+            if stats["max_alloc_bytes"] is not None:
+                lines.append(f"dispatcher_operation_max_alloc_bytes{selector(operation, labels)} {stats['max_alloc_bytes']}")
+        lines += [
+            "# HELP dispatcher_process_max_rss_bytes Peak resident set size of the process.",
+            "# TYPE dispatcher_process_max_rss_bytes gauge",
+            f"dispatcher_process_max_rss_bytes {max_rss_bytes()}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, file_path: str):
+        """Atomically write the Prometheus text file."""
+        directory = os.path.dirname(os.path.abspath(file_path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, file_path)
+
+
+class _Timer:
+    __slots__ = ("registry", "operation", "labels", "_start", "_traced")
+
+    def __init__(self, registry, operation, labels):
+        self.registry = registry
+        self.operation = operation
+        self.labels = labels
+
+    def __enter__(self):
+        self._traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self._start
+        alloc = None
+        if self._traced is not None and tracemalloc.is_tracing():
+            alloc = max(0, tracemalloc.get_traced_memory()[0] - self._traced)
+        self.registry.record(self.operation, seconds, alloc, **self.labels)
+        return False
+
+    def __call__(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Timer(self.registry, self.operation, self.labels):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def max_rss_bytes():
+    """Return the peak resident set size of this process in bytes (0 if unknown)."""
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+registry = MetricsRegistry()
+timed = registry.timed
@@ -0,0 +1,284 @@
+import re
+
+try:
+    from re import _compiler as sre_compile, _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_compile  # type: ignore
+    import sre_constants  # type: ignore
+    import sre_parse  # type: ignore
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+_GROUPREFS = {sre_constants.GROUPREF, sre_constants.GROUPREF_EXISTS}
+_LEADING_FLAGS = re.compile(r"^\(\?([aiLmsux]+)\)")
+
+# Repeats up to this many times ({2}, {1,5}, ...) cannot blow up; only
+# larger or unbounded repeats count as looping for the risk checks.
+SMALL_REPEAT = 10
+
+# Characters sampled to decide whether two parts of a pattern can match the
+# same text: ASCII plus a few non-ASCII letters.
+_SAMPLE_CHARS = [chr(code) for code in range(128)] + ["\u00e9", "\u00df", "\u4e00"]
+_NULLABLE_OPS = {sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT}
+
+
+def _subpatterns(op, av):
+    """Yield the nested parsed subpatterns of one parser opcode."""
+    if op in _REPEATS:
+        yield av[2]
+    elif op is sre_constants.SUBPATTERN:
+        yield av[3]
+    elif op is sre_constants.BRANCH:
+        yield from av[1]
+    elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+        yield av[1]
+    elif op is sre_constants.GROUPREF_EXISTS:
+        yield av[1]
+        if av[2] is not None:
+            yield av[2]
+
+
+def _single_chars(op, av, state):
+    """Return the sample characters a single-character item (literal, class, '.') matches."""
+    pattern = sre_compile.compile(sre_parse.SubPattern(state, [(op, av)]), state.flags)
+    return frozenset(char for char in _SAMPLE_CHARS if pattern.fullmatch(char))
+
+
+def _first_chars(items, state):
+    """Return (characters a match of the item sequence can start with, whether it can match empty)."""
+    chars = set()
+    for op, av in items:
+        if op in _REPEATS or op is getattr(sre_constants, "POSSESSIVE_REPEAT", None):
+            first, nullable = _first_chars(av[2], state)
+            nullable = nullable or av[0] == 0
+        elif op is sre_constants.SUBPATTERN:
+            first, nullable = _first_chars(av[3], state)
+        elif op is getattr(sre_constants, "ATOMIC_GROUP", None):
+            first, nullable = _first_chars(av, state)
+        elif op is sre_constants.BRANCH:
+            first, nullable = set(), False
+            for branch in av[1]:
+                branch_first, branch_nullable = _first_chars(branch, state)
+                first |= branch_first
+                nullable = nullable or branch_nullable
+        elif op in _NULLABLE_OPS:
+            first, nullable = set(), True
+        elif op in (sre_constants.LITERAL, sre_constants.NOT_LITERAL, sre_constants.ANY, sre_constants.IN):
+            first, nullable = _single_chars(op, av, state), False
+        else:  # Backreferences and the like: assume anything
+            first, nullable = set(_SAMPLE_CHARS), True
+        chars |= first
+        if not nullable:
+            return chars, False
+    return chars, True
+
+
+def _flatten(items):
+    """Inline the contents of groups into one sequence of items."""
+    for op, av in items:
+        if op is sre_constants.SUBPATTERN:
+            yield from _flatten(av[3])
+        else:
+            yield op, av
+
+
+def _contains_unbounded(items):
+    stack = [items]
+    while stack:
+        for op, av in stack.pop():
+            if op in _REPEATS and av[1] == sre_constants.MAXREPEAT:
+                return True
+            stack.extend(_subpatterns(op, av))
+    return False
+
+
+def _ambiguous_body(body, state):
+    """Return why the body of a looping repeat can split one text in many ways, or None.
+
+    An unbounded repeat inside it is only ambiguous when the characters it
+    consumes can also start what follows it, e.g. ``(a+)+`` or ``(.*,)*``,
+    but not ``(\\d+\\.)+`` where the ``.`` delimits every ``\\d+``.
+    """
+    items = list(_flatten(body))
+    for index, (op, av) in enumerate(items):
+        if op in _REPEATS and av[1] == sre_constants.MAXREPEAT:
+            consumed, _ = _first_chars(av[2], state)
+            following = set()
+            # What follows: the rest of the body, then the next iteration.
+            for position in list(range(index + 1, len(items))) + list(range(index + 1)):
+                if position == index:
+                    following |= consumed
+                    break
+                first, nullable = _first_chars([items[position]], state)
+                following |= first
+                if not nullable:
+                    break
+            if consumed & following:
+                return "nested unbounded quantifier"
+        elif op in _REPEATS or op is sre_constants.BRANCH or op is sre_constants.GROUPREF_EXISTS:
+            # Bounded repeats and alternations around an unbounded repeat: stay conservative.
+            if any(_contains_unbounded(sub) for sub in _subpatterns(op, av)):
+                return "nested unbounded quantifier"
+    return None
+
+
+def _first_ops(parsed):
+    """Return the opcode that starts each item of a parsed pattern, for overlap checks."""
+    for op, av in parsed:
+        if op is sre_constants.SUBPATTERN:
+            return _first_ops(av[3])
+        return (op, av if not isinstance(av, list) else tuple(map(str, av)))
+    return None
+
+
+def _find_risk(parsed, repeated, state):
+    for op, av in parsed:
+        if op in _REPEATS:
+            loops = av[1] == sre_constants.MAXREPEAT or av[1] > SMALL_REPEAT
+            reason = (_ambiguous_body(av[2], state) if loops else None) or _find_risk(av[2], repeated or loops, state)
+            if reason:
+                return reason
+            continue
+        if op is sre_constants.BRANCH and repeated:
+            # The parser factors a common prefix out of the branches, so
+            # (a|aa) arrives as a(?:|a): an empty branch means one branch
+            # was a prefix of another.
+            if any(not branch for branch in av[1]):
+                return "repeated alternation with an empty or prefix-overlapping branch"
+            starts = [_first_ops(branch) for branch in av[1]]
+            if len(starts) != len(set(map(str, starts))):
+                return "repeated alternation with overlapping branches"
+        for sub in _subpatterns(op, av):
+            reason = _find_risk(sub, repeated, state)
+            if reason:
+                return reason
+    return None
+
+
+def regex_risk(pattern):
+    """Return why a pattern risks catastrophic backtracking, or None if it looks safe.
+
+    Flags nested unbounded repeats whose inner repeat can also match what
+    follows it, such as ``(a+)+`` or ``(.*,)*`` (but not ``(\\d+\\.)+``),
+    and repeated alternations whose branches start alike or are prefixes
+    of each other, such as ``(a|a)*`` or ``(a|aa)+``. Small bounded repeats
+    like ``{2}`` are not treated as loops. Possessive quantifiers and atomic groups are not
+    reported since they cannot backtrack.
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None  # Syntax errors are reported by re.compile
+    return _find_risk(parsed, False, parsed.state)
+
+
+def _can_combine(parsed):
+    """Return True if a parsed pattern can be embedded in a combined regex unchanged."""
+    if parsed.state.groupdict:
+        return False  # Named groups would collide across patterns
+
+    stack = [parsed]
+    while stack:
+        for op, av in stack.pop():
+            if op in _GROUPREFS:
+                return False  # Numbered backreferences shift once combined
+            stack.extend(_subpatterns(op, av))
+    return True
+
+
+def _anchored(parsed):
+    """Return True if a parsed pattern can only match at the start of the value."""
+    if not parsed or parsed.state.flags & sre_constants.SRE_FLAG_MULTILINE:
+        return False
+    op, av = parsed[0]
+    return op is sre_constants.AT and av in (sre_constants.AT_BEGINNING, sre_constants.AT_BEGINNING_STRING)
+
+
+def _embed(pattern):
+    """Rewrite leading global flags like ``(?i)`` into a scoped group."""
+    flags = _LEADING_FLAGS.match(pattern)
+    if flags:
+        return f"(?{flags.group(1)}:{pattern[flags.end():]})"
+    return f"(?:{pattern})"
+
+
+class RegexMatchSet:
+    """Evaluate many ``~=`` patterns on one header value with few regex calls.
+
+    ``first_match`` folds every pattern anchored with ``^`` into one ordered
+    alternation, so the engine stops at the first anchored pattern that
+    hits. Unanchored patterns share one alternation used as a single-pass
+    prefilter; they are only searched one by one when the prefilter hits.
+    ``matches`` uses one optional lookahead plus an empty marker group per
+    pattern and reports every pattern that would have hit with
+    ``re.search``. Patterns that cannot be combined (backreferences, named
+    groups) are always searched separately.
+    """
+
+    __slots__ = ("keys", "_anchored", "_names", "_prefilter", "_scan", "_all", "_markers", "_separate")
+
+    def __init__(self, entries):
+        """entries: iterable of (key, pattern) pairs; keys are reported in this order."""
+        self.keys = []
+        anchored = []
+        unanchored = []
+        lookaheads = []
+        markers = []
+        scan = []
+        separate = []
+        for key, pattern in entries:
+            position = len(self.keys)
+            self.keys.append(key)
+            parsed = sre_parse.parse(pattern)
+            if not _can_combine(parsed):
+                separate.append((position, key, re.compile(pattern)))
+                scan.append((position, key, re.compile(pattern)))
+                continue
+            name = f"_m{position}"
+            body = _embed(pattern)
+            if _anchored(parsed):
+                anchored.append(f"{body}(?P<{name}>)")
+                lookaheads.append(f"(?:(?={body})(?P<{name}>))?")
+            else:
+                unanchored.append(body)
+                scan.append((position, key, re.compile(pattern)))
+                lookaheads.append(rf"(?:(?=[\s\S]*?{body})(?P<{name}>))?")
+            markers.append((position, key, name))
+
+        self._anchored = re.compile("|".join(anchored)) if anchored else None
+        self._names = {f"_m{position}": (position, key) for position, key, _ in markers}
+        # The prefilter can only rule out a scan when it covers every scanned pattern.
+        self._prefilter = re.compile("|".join(unanchored)) if unanchored and not separate else None
+        self._scan = tuple(scan)
+
+        self._all = re.compile("".join(lookaheads)) if lookaheads else None
+        if self._all is not None:
+            markers = [(position, key, self._all.groupindex[name] - 1) for position, key, name in markers]
+        self._markers = tuple(markers)
+        self._separate = tuple(separate)
+
+    def matches(self, value):
+        """Return the keys of every pattern that matches value, in entry order."""
+        hits = []
+        if self._all is not None:
+            groups = self._all.match(value).groups()
+            hits = [(position, key) for position, key, group in self._markers if groups[group] is not None]
+        if self._separate:
+            hits.extend((position, key) for position, key, pattern in self._separate if pattern.search(value))
+            hits.sort(key=lambda hit: hit[0])
+        return [key for _, key in hits]
+
+    def first_match(self, value):
+        """Return the key of the first entry whose pattern matches value, or None."""
+        best = None
+        if self._anchored is not None:
+            match = self._anchored.match(value)
+            if match is not None:
+                best = self._names[match.lastgroup]
+        if self._scan and (self._prefilter is None or self._prefilter.search(value)):
+            for position, key, pattern in self._scan:
+                if best is not None and position > best[0]:
+                    break
+                if pattern.search(value):
+                    best = (position, key)
+                    break
+        return best[1] if best is not None else None
@@ -0,0 +1,162 @@
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from config_loader import DEFAULT_CONFIG_FILE, load_and_validate_config
+from rollout import DEFAULT_STICKY_HEADER
+from routing import compile_config
+
+DEFAULT_CHUNK_SIZE = 10000
+
+# Routing table of the current worker process, built once by _init_worker.
+_table = None
+
+
+def iter_chunks(file_path: str, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield lists of raw lines from a JSONL file without reading it all into memory."""
+    chunk = []
+    with open(file_path, "rb") as f:
+        for line in f:
+            chunk.append(line)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_record(line):
+    """Return (uri, headers) for one JSONL request record, or None if it is unusable."""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict):
+        return None
+    uri = record.get("uri") or record.get("path")
+    if not isinstance(uri, str):
+        return None
+    headers = record.get("headers")
+    return uri, headers if isinstance(headers, dict) else {}
+
+
+def _init_worker(config_path, sticky_header):
+    global _table
+    _table = compile_config(load_and_validate_config(config_path), sticky_header)
+
+
+def replay_chunk(lines, table=None):
+    """Route a chunk of raw JSONL lines and return (decision counts, unrouted, invalid)."""
+    table = table or _table
+    decisions = Counter()
+    unrouted = invalid = 0
+    for line in lines:
+        request = parse_record(line)
+        if request is None:
+            if line.strip():
+                invalid += 1
+            continue
+        decision = table.route(*request)
+        if decision is None:
+            unrouted += 1
+        else:
+            decisions[decision] += 1
+    return decisions, unrouted, invalid
+
+
+class ReplayResult:
+    """Aggregated routing decisions of a replayed request log."""
+
+    def __init__(self):
+        self.decisions = Counter()
+        self.unrouted = 0
+        self.invalid = 0
+
+    def add(self, chunk_result):
+        decisions, unrouted, invalid = chunk_result
+        self.decisions.update(decisions)
+        self.unrouted += unrouted
+        self.invalid += invalid
+
+    def summary(self):
+        """Return per-service, per-rule, per-upstream and rollstrategy group counts."""
+        services = {}
+        upstreams = Counter()
+        for (service, rule, upstream, group), count in self.decisions.items():
+            stats = services.setdefault(service, {"requests": 0, "rules": Counter(), "upstreams": Counter()})
+            stats["requests"] += count
+            stats["rules"][rule or "(default)"] += count
+            stats["upstreams"][upstream] += count
+            if group is not None:
+                stats.setdefault("groups", Counter())[group] += count
+            upstreams[upstream] += count
+
+        return {
+            "requests": sum(self.decisions.values()) + self.unrouted + self.invalid,
+            "routed": sum(self.decisions.values()),
+            "unrouted": self.unrouted,
+            "invalid": self.invalid,
+            "services": {name: {key: dict(value) if isinstance(value, Counter) else value for key, value in stats.items()} for name, stats in services.items()},
+            "upstreams": dict(upstreams),
+        }
+
+
+def map_chunks(log_path: str, func, workers, chunk_size=DEFAULT_CHUNK_SIZE, initializer=None, initargs=()):
+    """Apply func to every chunk of a JSONL log in a process pool and yield the results as they complete.
+
+    Workers are set up once by ``initializer(*initargs)``; only raw lines are
+    sent to them and only func's (small) result comes back.
+    """
+    # Keep a bounded number of chunks in flight so memory stays flat.
+    max_pending = workers * 2
+    with ProcessPoolExecutor(workers, initializer=initializer, initargs=initargs) as pool:
+        pending = set()
+        for chunk in iter_chunks(log_path, chunk_size):
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(pool.submit(func, chunk))
+        for future in pending:
+            yield future.result()
+
+
+def replay_log(log_path: str, config_path: str, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, sticky_header=DEFAULT_STICKY_HEADER):
+    """Stream a JSONL request log through the routing table of config_path."""
+    config = load_and_validate_config(config_path)
+    result = ReplayResult()
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        table = compile_config(config, sticky_header)
+        for chunk in iter_chunks(log_path, chunk_size):
+            result.add(replay_chunk(chunk, table))
+        return result
+
+    for chunk_result in map_chunks(log_path, replay_chunk, workers, chunk_size, _init_worker, (config_path, sticky_header)):
+        result.add(chunk_result)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a JSONL request log through the dispatcher routing table.")
+    parser.add_argument("log", nargs="?", default="requests.jsonl", help="JSONL file with one {\"uri\", \"headers\"} record per line")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_FILE, help="Dispatcher configuration file")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Records per chunk sent to a worker")
+    parser.add_argument("--sticky-header", default=DEFAULT_STICKY_HEADER, help="Header hashed to pick a rollstrategy group")
+    args = parser.parse_args(argv)
+
+    result = replay_log(args.log, args.config, workers=args.workers, chunk_size=args.chunk_size, sticky_header=args.sticky_header)
+    json.dump(result.summary(), sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
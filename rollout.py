@@ -0,0 +1,88 @@
+import random
+import zlib
+
+# Rollstrategy weights are percentages, so each service gets a 100-slot
+# lookup table: a pick is one hash (or random draw) and one tuple index.
+BUCKETS = 100
+DEFAULT_STICKY_HEADER = "X-Tool-Id"
+
+
+def sticky_bucket(key):
+    """Map a sticky key (e.g. a tool id) to a stable bucket in [0, BUCKETS)."""
+    h = zlib.crc32(str(key).encode("utf-8"))
+    # crc32 of similar short ids clusters; scramble the bits before reducing.
+    h = (h * 0x9E3779B1) & 0xFFFFFFFF
+    return (h >> 16) % BUCKETS
+
+
+def bucket_quotas(weights):
+    """Split BUCKETS slots across weights using the largest remainder method."""
+    total = sum(weights)
+    if total <= 0:
+        raise ValueError("Rollstrategy weights must sum to a positive value")
+    exact = [weight * BUCKETS / total for weight in weights]
+    quotas = [int(share) for share in exact]
+    by_remainder = sorted(range(len(weights)), key=lambda i: exact[i] - quotas[i], reverse=True)
+    for i in by_remainder[:BUCKETS - sum(quotas)]:
+        quotas[i] += 1
+    return quotas
+
+
+def allocate_buckets(group_ids, weights, previous=None):
+    """Return a tuple mapping every bucket to an index into group_ids.
+
+    Without ``previous`` groups get contiguous ranges in order. With a
+    previous allocation (a tuple of group ids per bucket), every bucket
+    keeps its group while that group still has quota, and only the
+    surplus buckets move, so a weight change moves as few keys as possible.
+    """
+    quotas = bucket_quotas(weights)
+    if previous is None:
+        table = []
+        for index, quota in enumerate(quotas):
+            table.extend([index] * quota)
+        return tuple(table)
+
+    position = {group_id: index for index, group_id in enumerate(group_ids)}
+    remaining = list(quotas)
+    table = [None] * BUCKETS
+    for bucket, group_id in enumerate(previous):
+        index = position.get(group_id)
+        if index is not None and remaining[index] > 0:
+            table[bucket] = index
+            remaining[index] -= 1
+    needy = (index for index, count in enumerate(remaining) for _ in range(count))
+    for bucket, index in enumerate(table):
+        if index is None:
+            table[bucket] = next(needy)
+    return tuple(table)
+
+
+class WeightedChooser:
+    """Constant-time weighted selection of rollstrategy groups."""
+
+    __slots__ = ("groups", "table")
+
+    def __init__(self, groups, previous=None):
+        self.groups = tuple((group["id"], group["upstream_id"]) for group in groups)
+        group_ids = [group_id for group_id, _ in self.groups]
+        self.table = allocate_buckets(group_ids, [group["weight"] for group in groups],
+                                      previous.bucket_groups() if previous is not None else None)
+
+    def bucket_groups(self):
+        """Return the group id owning each bucket."""
+        return tuple(self.groups[index][0] for index in self.table)
+
+    def pick(self, key=None, bucket=None):
+        """Return (group_id, upstream_id) for a sticky key, an explicit bucket, or a random draw."""
+        if bucket is None:
+            bucket = sticky_bucket(key) if key is not None else random.randrange(BUCKETS)
+        return self.groups[self.table[bucket]]
+
+
+def build_chooser(service, previous=None):
+    """Return a WeightedChooser for the service's rollstrategy groups, or None."""
+    groups = (service.get("rollstrategy") or {}).get("groups")
+    if not groups:
+        return None
+    return WeightedChooser(groups, previous)
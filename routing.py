@@ -0,0 +1,175 @@
+import re
+from collections import namedtuple
+from types import MappingProxyType
+
+from config_validator import ConfigValidationError, split_uri
+from regex_matcher import RegexMatchSet
+from rollout import DEFAULT_STICKY_HEADER, build_chooser
+
+# Result of a routing decision. `rule` is None when no rule matched; the
+# request then went to a rollstrategy `group` if the service has groups,
+# otherwise to the default upstream (and `group` is None).
+RouteDecision = namedtuple("RouteDecision", ["service", "rule", "upstream", "group"], defaults=[None])
+
+_LEAF = None  # Trie key holding the service compiled for that prefix
+
+
+class CompiledService:
+    """Read-only routing data for a single service."""
+
+    __slots__ = ("name", "uri", "default_upstream", "rules", "eq_index", "regex_sets", "chooser", "sticky_header")
+
+    def __init__(self, service, sticky_header=DEFAULT_STICKY_HEADER, previous=None):
+        self.name = service["name"]
+        self.uri = service["uri"]
+        self.default_upstream = service["default_upstream"]
+        self.chooser = build_chooser(service, previous.chooser if previous is not None else None)
+        self.sticky_header = sticky_header.lower() if sticky_header else None
+        # Rules are evaluated in order, so a rule's position is its priority.
+        self.rules = tuple((rule["id"], rule["upstream_id"]) for rule in service["rules"])
+
+        # A rule fires when any of its matches hits; record for every match the
+        # first rule that references it so a hit maps straight to a rule.
+        match_rank = {}
+        for rank, rule in enumerate(service["rules"]):
+            for match_id in rule["matches"]:
+                match_rank.setdefault(match_id, rank)
+
+        eq_index = {}
+        regex_patterns = {}
+        for match in service["matches"]:
+            rank = match_rank.get(match["id"])
+            if rank is None:
+                continue  # Not referenced by any rule, can never decide a route
+            header = match["header_name"].lower()
+            value = str(match["value"])
+            if match["operator"] == "==":
+                values = eq_index.setdefault(header, {})
+                if rank < values.get(value, rank + 1):
+                    values[value] = rank
+            elif match["operator"] == "~=":
+                try:
+                    re.compile(value)
+                except re.error as e:
+                    raise ConfigValidationError(f"Invalid regex '{value}' in match '{match['id']}' of service {self.name}: {e}")
+                regex_patterns.setdefault(header, []).append((rank, value))
+            else:
+                raise ConfigValidationError(f"Unsupported operator '{match['operator']}' in match '{match['id']}' of service {self.name}")
+
+        self.eq_index = tuple((header, MappingProxyType(values)) for header, values in eq_index.items())
+        # All patterns on one header are evaluated by a single combined regex,
+        # keyed and ordered by rank so the first hit is the best rule. Headers
+        # are sorted by their best rank so evaluation can stop early.
+        regex_sets = []
+        for header, patterns in regex_patterns.items():
+            patterns.sort(key=lambda entry: entry[0])
+            regex_sets.append((patterns[0][0], header, RegexMatchSet(patterns)))
+        self.regex_sets = tuple((header, match_set, rank) for rank, header, match_set in sorted(regex_sets, key=lambda entry: entry[0]))
+
+    def select_rule(self, headers):
+        """Return the index of the first rule matching the (lower-cased) headers, or None."""
+        best = len(self.rules)
+        for header, values in self.eq_index:
+            value = headers.get(header)
+            if value is not None:
+                rank = values.get(value)
+                if rank is not None and rank < best:
+                    best = rank
+        for header, match_set, rank in self.regex_sets:
+            if rank >= best:
+                break
+            value = headers.get(header)
+            if value is not None:
+                hit = match_set.first_match(value)
+                if hit is not None and hit < best:
+                    best = hit
+        return best if best < len(self.rules) else None
+
+    def route(self, headers, bucket=None):
+        """Return the RouteDecision for this service given lower-cased headers.
+
+        ``bucket`` forces the rollstrategy bucket instead of hashing the
+        sticky header, e.g. to compare two configs on the same random draw.
+        """
+        rank = self.select_rule(headers)
+        if rank is None:
+            if self.chooser is None:
+                return RouteDecision(self.name, None, self.default_upstream)
+            key = headers.get(self.sticky_header) if self.sticky_header else None
+            group_id, upstream_id = self.chooser.pick(key, bucket)
+            return RouteDecision(self.name, None, upstream_id, group_id)
+        rule_id, upstream_id = self.rules[rank]
+        return RouteDecision(self.name, rule_id, upstream_id)
+
+
+class RoutingTable:
+    """Immutable routing table produced by compile_config."""
+
+    __slots__ = ("services", "_trie")
+
+    def __init__(self, services, trie):
+        self.services = MappingProxyType(services)
+        self._trie = trie
+
+    def __setattr__(self, name, value):
+        if hasattr(self, "_trie"):
+            raise AttributeError("RoutingTable is immutable")
+        object.__setattr__(self, name, value)
+
+    def find_service(self, uri):
+        """Return the CompiledService with the longest URI prefix matching uri, or None."""
+        node = self._trie
+        best = node.get(_LEAF)
+        for segment in split_uri(uri):
+            node = node.get(segment)
+            if node is None:
+                break
+            service = node.get(_LEAF)
+            if service is not None:
+                best = service
+        return best
+
+    def route(self, uri, headers=None, bucket=None):
+        """Return the RouteDecision for a request, or None if no service serves the URI."""
+        service = self.find_service(uri)
+        if service is None:
+            return None
+        if headers:
+            headers = {str(name).lower(): str(value) for name, value in headers.items()}
+        else:
+            headers = {}
+        return service.route(headers, bucket)
+
+
+def _freeze_trie(node):
+    """Recursively wrap the trie nodes in read-only mappings."""
+    return MappingProxyType({
+        key: child if key is _LEAF else _freeze_trie(child)
+        for key, child in node.items()
+    })
+
+
+def compile_config(config, sticky_header=DEFAULT_STICKY_HEADER, previous=None):
+    """Compile a validated configuration into an immutable RoutingTable.
+
+    Requests that match no rule are spread over the rollstrategy groups by
+    hashing ``sticky_header`` (random when the header is absent). Passing
+    the ``previous`` RoutingTable keeps as many sticky keys as possible on
+    their old group when weights change.
+    """
+    services = {}
+    trie = {}
+    for service in config.get("services", []):
+        if service.get("admin_state", "enabled") == "disabled":
+            continue
+        compiled = CompiledService(service, sticky_header, previous.services.get(service["name"]) if previous is not None else None)
+        services[compiled.name] = compiled
+
+        node = trie
+        for segment in split_uri(compiled.uri):
+            node = node.setdefault(segment, {})
+        if _LEAF in node:
+            raise ConfigValidationError(f"Service {compiled.name} uses URI '{compiled.uri}' already served by service {node[_LEAF].name}")
+        node[_LEAF] = compiled
+
+    return RoutingTable(services, _freeze_trie(trie))
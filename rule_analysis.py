@@ -0,0 +1,103 @@
+"""Static analysis of how the rules of a service interact.
+
+Rules are tried in order and a rule fires when any of its matches hits, so
+a match only matters in the first rule that can see it. Matches are indexed
+by header -> operator -> value, which lets every question below be
+answered with one lookup per match instead of comparing rules pairwise:
+
+* a ``==`` match is covered by an earlier rule holding the same match, or an
+  earlier ``~=`` match on the same header whose pattern hits that value;
+* a ``~=`` match is covered only by an earlier identical pattern (regex
+  containment is undecidable in general, so no guesses are made).
+
+Every finding is a warning: the configuration still routes deterministically.
+"""
+from regex_matcher import RegexMatchSet
+
+
+def match_key(match):
+    """Return the (header, operator, value) a match tests; header names are case-insensitive."""
+    return str(match["header_name"]).lower(), match["operator"], str(match["value"])
+
+
+def build_match_index(matches):
+    """Return {header: {operator: {value: [match positions]}}} in file order."""
+    index = {}
+    for position, match in enumerate(matches):
+        header, operator, value = match_key(match)
+        index.setdefault(header, {}).setdefault(operator, {}).setdefault(value, []).append(position)
+    return index
+
+
+def _quote(ids):
+    return ", ".join(f"'{item}'" for item in ids)
+
+
+def analyze_rules(service):
+    """Return (path, message, severity) warnings for shadowed rules, conflicting overlaps, duplicate and dead matches.
+
+    Expects a service that passed check_service's structural checks.
+    """
+    issues = []
+    name = service.get("name", "unknown")
+    matches = service.get("matches") or []
+    rules = service.get("rules") or []
+    index = build_match_index(matches)
+
+    # Duplicate matches: the same test under several IDs.
+    canonical = {}  # match id -> id of the first match with the same test
+    for header, operators in index.items():
+        for operator, values in operators.items():
+            for value, positions in values.items():
+                first = matches[positions[0]]["id"]
+                for position in positions:
+                    canonical[matches[position]["id"]] = first
+                    if position != positions[0]:
+                        issues.append((("matches", position), f"Match '{matches[position]['id']}' in service {name} duplicates match '{first}' ({header} {operator} '{value}')", "warning"))
+
+    # Dead matches: defined but referenced by no rule.
+    used = {match_id for rule in rules for match_id in rule.get("matches") or []}
+    for position, match in enumerate(matches):
+        if match["id"] not in used:
+            issues.append((("matches", position), f"Match '{match['id']}' in service {name} is not used by any rule", "warning"))
+
+    # The first rule that claims each distinct test decides every request hitting it.
+    by_id = {match["id"]: match for match in matches}
+    claimed = {}  # canonical match id -> rule rank
+    for rank, rule in enumerate(rules):
+        for match_id in rule.get("matches") or []:
+            claimed.setdefault(canonical.get(match_id, match_id), rank)
+
+    regex_sets = {}
+    for header, operators in index.items():
+        patterns = sorted(
+            (claimed[matches[positions[0]]["id"]], value)
+            for value, positions in operators.get("~=", {}).items()
+            if matches[positions[0]]["id"] in claimed
+        )
+        if patterns:
+            regex_sets[header] = RegexMatchSet(patterns)
+
+    for rank, rule in enumerate(rules):
+        match_ids = [match_id for match_id in rule.get("matches") or [] if match_id in by_id]
+        if not match_ids:
+            continue
+        covered = {}  # match id -> rank of the earlier rule that takes its requests
+        for match_id in match_ids:
+            first = claimed[canonical[match_id]]
+            header, operator, value = match_key(by_id[match_id])
+            if operator == "==" and header in regex_sets:
+                hit = regex_sets[header].first_match(value)
+                if hit is not None:
+                    first = min(first, hit)
+            if first < rank:
+                covered[match_id] = first
+
+        if len(covered) == len(match_ids):
+            earlier = sorted(set(covered.values()))
+            issues.append((("rules", rank), f"Rule '{rule['id']}' in service {name} is unreachable: all its matches are taken by earlier rule(s) {_quote(rules[r]['id'] for r in earlier)}", "warning"))
+            continue
+        for match_id, first in covered.items():
+            if rules[first]["upstream_id"] != rule["upstream_id"]:
+                issues.append((("rules", rank, "matches"), f"Match '{match_id}' of rule '{rule['id']}' in service {name} never routes to '{rule['upstream_id']}': earlier rule '{rules[first]['id']}' sends those requests to '{rules[first]['upstream_id']}'", "warning"))
+    return issues
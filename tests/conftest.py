@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config_validator import load_yaml  # noqa: E402
+
+INPUT_CONFIG = os.path.join(ROOT, "config", "input.yaml")
+
+
+@pytest.fixture
+def input_config():
+    """A fresh copy of config/input.yaml."""
+    return load_yaml(INPUT_CONFIG)
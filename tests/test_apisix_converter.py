@@ -0,0 +1,69 @@
+import copy
+
+from apisix_converter import MAX_ID_LENGTH, iter_apisix_objects, iter_routes, route_id, route_object, upstream_object
+
+
+def routes(config):
+    return {route["name"]: route for route in iter_routes(config)}
+
+
+def test_route_serves_the_prefix_and_everything_below_it(input_config):
+    assert routes(input_config)["RMS"]["uris"] == ["/rms", "/rms/*"]
+    root = {"name": "root", "uri": "/", "default_upstream": "u", "upstreams": [{"id": "u", "target": "t", "port": 80}]}
+    assert route_object(root, {"u": "ups-u"})["uris"] == ["/", "/*"]
+
+
+def test_rules_become_match_rules_in_order(input_config):
+    rms = routes(input_config)["RMS"]
+    green = upstream_object(input_config["services"][0]["upstreams"][1])["id"]
+    rules = rms["plugins"]["traffic-split"]["rules"]
+    assert rules[0] == {
+        "match": [{"vars": [["http_x_tool_id", "==", "tool123"]]}, {"vars": [["http_x_tool_id", "==", "tool456"]]}],
+        "weighted_upstreams": [{"upstream_id": green, "weight": 1}],
+    }
+    assert rules[1]["match"] == [{"vars": [["http_x_tool_type", "~~", "^type.*"]]}]
+
+
+def test_rollstrategy_becomes_a_weighted_catch_all(input_config):
+    blue, green = (upstream_object(upstream)["id"] for upstream in input_config["services"][0]["upstreams"])
+    last = routes(input_config)["RMS"]["plugins"]["traffic-split"]["rules"][-1]
+    assert "match" not in last
+    assert last["weighted_upstreams"] == [{"upstream_id": green, "weight": 20}, {"upstream_id": blue, "weight": 80}]
+    assert routes(input_config)["RMS"]["upstream_id"] == blue
+
+
+def test_service_without_rules_or_groups_has_no_plugin(input_config):
+    mms = input_config["services"][1]
+    mms["rules"] = []
+    mms["admin_state"] = "disabled"
+    route = routes(input_config)["MMS"]
+    assert "plugins" not in route
+    assert route["status"] == 0
+
+
+def test_shared_upstreams_are_emitted_once(input_config):
+    clone = copy.deepcopy(input_config["services"][0])
+    clone["name"], clone["uri"] = "RMS2", "/rms2/"
+    input_config["services"].append(clone)
+    upstream_ids = [obj["id"] for kind, obj in iter_apisix_objects(input_config) if kind == "upstreams"]
+    assert len(upstream_ids) == len(set(upstream_ids)) == 4
+    assert routes(input_config)["RMS2"]["upstream_id"] == routes(input_config)["RMS"]["upstream_id"]
+
+
+def test_route_ids_are_unique_when_names_sanitize_alike(input_config):
+    base = input_config["services"][0]
+    for index, name in enumerate(["rms", "r m s", "R-M-S", "r/m/s"]):
+        clone = copy.deepcopy(base)
+        clone["name"], clone["uri"] = name, f"/clone{index}/"
+        input_config["services"].append(clone)
+    ids = [route["id"] for route in iter_routes(input_config)]
+    assert ids[:2] == ["rms", "mms"]
+    assert len(ids) == len(set(ids))
+    assert ids[2] == route_id("rms", hashed=True)
+
+
+def test_route_id_is_valid_and_bounded():
+    assert route_id("RMS") == "rms"
+    long_id = route_id("x" * 100)
+    assert len(long_id) <= MAX_ID_LENGTH
+    assert long_id != route_id("x" * 99)
@@ -0,0 +1,114 @@
+import pytest
+
+from apisix_converter import iter_apisix_objects
+from apisix_stub import AdminStub
+from apisix_sync import AdminClient, apply_plan, plan_sync, sync_config
+
+
+@pytest.fixture
+def stub():
+    stub = AdminStub().start()
+    yield stub
+    stub.stop()
+
+
+def make_client(stub, **kwargs):
+    return AdminClient(stub.url, backoff=0, **kwargs)
+
+
+def operations(phases):
+    return [(operation.method, operation.kind, operation.id) for phase in phases for operation in phase]
+
+
+def test_first_sync_creates_everything_and_second_is_a_no_op(stub, input_config):
+    client = make_client(stub)
+    phases, result = sync_config(input_config, client)
+    assert not result.failed
+    assert result.applied == {"PUT upstreams": 4, "PUT routes": 2}
+    assert sorted(stub.store.objects["routes"]) == ["mms", "rms"]
+
+    phases, result = sync_config(input_config, client)
+    assert phases == [[], [], [], []]
+    assert result.applied == {}
+    client.close()
+
+
+def test_stale_owned_fields_are_removed(stub, input_config):
+    client = make_client(stub)
+    sync_config(input_config, client)
+    assert "plugins" in stub.store.objects["routes"]["rms"]
+
+    rms = input_config["services"][0]
+    rms["rules"] = []
+    rms["rollstrategy"] = None
+    phases, result = sync_config(input_config, client)
+    assert operations(phases) == [("PUT", "routes", "rms")]
+    assert not result.failed
+    assert "plugins" not in stub.store.objects["routes"]["rms"]
+    client.close()
+
+
+def test_gateway_defaults_do_not_trigger_writes(input_config):
+    current = {"upstreams": {}, "routes": {}}
+    for kind, obj in iter_apisix_objects(input_config):
+        labels = {"managed-by": "dispatcher"}
+        current[kind][obj["id"]] = {**obj, "labels": labels, "create_time": 1, "update_time": 2, "priority": 0}
+    assert plan_sync(iter_apisix_objects(input_config), current) == [[], [], [], []]
+
+
+def test_retries_injected_failures(input_config):
+    stub = AdminStub(fail_rate=0.3).start()
+    try:
+        client = make_client(stub, retries=20)
+        phases, result = sync_config(input_config, client)
+        assert not result.failed
+        assert sum(result.applied.values()) == 6
+        assert len(stub.store.objects["upstreams"]) == 4
+        assert stub.store.requests > 6
+        client.close()
+    finally:
+        stub.stop()
+
+
+def test_failed_phase_skips_later_phases(input_config):
+    stub = AdminStub(fail_rate=1.0).start()
+    try:
+        client = make_client(stub, retries=0)
+        current = {"upstreams": {}, "routes": {}}
+        result = apply_plan(client, plan_sync(iter_apisix_objects(input_config), current))
+        assert len(result.failed) == 4
+        assert result.skipped == 2
+        assert stub.store.objects["routes"] == {}
+        client.close()
+    finally:
+        stub.stop()
+
+
+def test_prune_deletes_routes_before_their_upstreams(stub, input_config):
+    client = make_client(stub)
+    sync_config(input_config, client)
+    client.put("routes", "hand-made", {"uris": ["/manual", "/manual/*"], "upstream_id": stub.store.objects["routes"]["rms"]["upstream_id"]})
+
+    input_config["services"] = input_config["services"][:1]
+    phases, result = sync_config(input_config, client)
+    assert operations(phases) == []
+    assert "mms" in stub.store.objects["routes"]
+
+    phases, result = sync_config(input_config, client, prune=True)
+    assert phases[2] == [op for op in phases[2] if op.kind == "routes"]
+    assert [(op.method, op.id) for op in phases[2]] == [("DELETE", "mms")]
+    assert {op.kind for op in phases[3]} == {"upstreams"}
+    assert len(phases[3]) == 2
+    assert not result.failed
+    assert sorted(stub.store.objects["routes"]) == ["hand-made", "rms"]
+    assert len(stub.store.objects["upstreams"]) == 2
+    client.close()
+
+
+def test_dry_run_does_not_write(stub, input_config):
+    client = make_client(stub)
+    phases, result = sync_config(input_config, client, dry_run=True)
+    assert result is None
+    assert len(operations(phases)) == 6
+    assert stub.store.objects["routes"] == {}
+    client.close()
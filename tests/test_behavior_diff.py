@@ -0,0 +1,60 @@
+import json
+
+import yaml
+
+from behavior_diff import behavior_diff
+from config_validator import load_yaml
+from conftest import INPUT_CONFIG
+
+REQUESTS = 200
+
+
+def write_log(path):
+    """Requests to both services, each with its own sticky X-Tool-Id, plus one bad line."""
+    with open(path, "w") as f:
+        for index in range(REQUESTS):
+            uri = "/rms/items" if index % 2 else "/mms/items"
+            f.write(json.dumps({"uri": uri, "headers": {"X-Tool-Id": f"user{index}"}}) + "\n")
+        f.write("not json\n")
+    return str(path)
+
+
+def write_config(path, config):
+    with open(path, "w") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+    return str(path)
+
+
+def test_unchanged_config_moves_nothing(tmp_path):
+    summary = behavior_diff(write_log(tmp_path / "log.jsonl"), INPUT_CONFIG, INPUT_CONFIG, workers=1).summary()
+    assert summary["requests"] == REQUESTS + 1
+    assert summary["invalid"] == 1
+    assert summary["skipped_identical"] == REQUESTS
+    assert summary["compared"] == summary["moved"] == 0
+    assert summary["services"] == {}
+
+
+def test_changed_default_upstream_moves_its_requests(tmp_path):
+    config = load_yaml(INPUT_CONFIG)
+    config["services"][1]["default_upstream"] = "mms-green"
+    new_path = write_config(tmp_path / "new.yaml", config)
+    summary = behavior_diff(write_log(tmp_path / "log.jsonl"), INPUT_CONFIG, new_path, workers=1).summary()
+    assert summary["skipped_identical"] == REQUESTS // 2
+    assert summary["moved"] == REQUESTS // 2
+    assert list(summary["services"]) == ["MMS"]
+    assert summary["services"]["MMS"]["upstreams"] == {"mms-blue -> mms-green": REQUESTS // 2}
+
+
+def test_changed_group_split_only_moves_the_shifted_share(tmp_path):
+    config = load_yaml(INPUT_CONFIG)
+    groups = config["services"][0]["rollstrategy"]["groups"]
+    groups[0]["weight"], groups[1]["weight"] = 50, 50
+    new_path = write_config(tmp_path / "new.yaml", config)
+    log_path = write_log(tmp_path / "log.jsonl")
+    summary = behavior_diff(log_path, INPUT_CONFIG, new_path, workers=1).summary()
+    assert summary["compared"] == REQUESTS // 2
+    assert 0 < summary["moved"] < REQUESTS // 2
+    # Growing group A only takes requests from B; nobody leaves A.
+    assert summary["services"]["RMS"]["upstreams"] == {"rms-blue -> rms-green": summary["moved"]}
+    # Sticky keys make the result reproducible.
+    assert behavior_diff(log_path, INPUT_CONFIG, new_path, workers=1).summary() == summary
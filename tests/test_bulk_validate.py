@@ -0,0 +1,31 @@
+import shutil
+
+import bulk_validate
+from bulk_validate import find_configs, iter_results
+
+
+def test_unexpected_error_in_one_file_is_reported_and_the_run_continues(tmp_path, monkeypatch):
+    for name in ("a.yaml", "b.yaml", "c.yaml"):
+        shutil.copy("config/input.yaml", tmp_path / name)
+    real = bulk_validate._validate
+
+    def validate(path):
+        if path.endswith("b.yaml"):
+            raise TypeError("'<' not supported between instances of 'int' and 'str'")
+        return real(path)
+
+    monkeypatch.setattr(bulk_validate, "_validate", validate)
+    results = {result["path"].rsplit("/", 1)[-1]: result for result in iter_results(find_configs([str(tmp_path)]), workers=1)}
+    assert sorted(results) == ["a.yaml", "b.yaml", "c.yaml"]
+    assert results["a.yaml"]["valid"] and results["c.yaml"]["valid"]
+    assert not results["b.yaml"]["valid"]
+    assert results["b.yaml"]["errors"] == 1
+    assert "TypeError" in results["b.yaml"]["issues"][0]["message"]
+
+
+def test_invalid_and_valid_files_in_worker_processes(tmp_path):
+    shutil.copy("config/input.yaml", tmp_path / "good.yaml")
+    (tmp_path / "bad.yaml").write_text("services: [{name: a, uri: /a/}]\n")
+    (tmp_path / "broken.yaml").write_text("services: [\n")
+    results = {result["path"].rsplit("/", 1)[-1]: result["valid"] for result in iter_results(find_configs([str(tmp_path)]), workers=2)}
+    assert results == {"good.yaml": True, "bad.yaml": False, "broken.yaml": False}
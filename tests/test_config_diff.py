@@ -0,0 +1,59 @@
+import copy
+
+from config_diff import categorize_diff_records, diff_configs
+from config_history import ConfigHistory
+
+
+def changes(records):
+    return [(record.change, record.object_type, record.service, record.property, record.old_value, record.new_value) for record in records]
+
+
+def test_identical_configs_have_no_differences(input_config):
+    assert diff_configs(input_config, copy.deepcopy(input_config)) == []
+
+
+def test_reversed_rules_are_reported(input_config):
+    new = copy.deepcopy(input_config)
+    new["services"][0]["rules"].reverse()
+    assert changes(diff_configs(input_config, new)) == [
+        ("Reordered", "rules", "RMS", "order", ["conditional-tool-id", "conditional-tool-type"], ["conditional-tool-type", "conditional-tool-id"]),
+    ]
+
+
+def test_reordered_groups_and_services_are_reported(input_config):
+    new = copy.deepcopy(input_config)
+    new["services"].reverse()
+    groups = new["services"][1]["rollstrategy"]["groups"]
+    groups.reverse()
+    records = changes(diff_configs(input_config, new))
+    assert ("Reordered", "services", None, "order", ["RMS", "MMS"], ["MMS", "RMS"]) in records
+    assert ("Reordered", "rollstrategy", "RMS", "order", ["A", "B"], ["B", "A"]) in records
+
+
+def test_added_and_removed_objects_are_not_reorders(input_config):
+    new = copy.deepcopy(input_config)
+    rules = new["services"][0]["rules"]
+    rules.insert(0, {"id": "first", "matches": ["Match1"], "upstream_id": "rms-blue"})
+    del rules[2]
+    assert [record.change for record in diff_configs(input_config, new)] == ["Removed", "Added"]
+
+
+def test_categorized_reorder(input_config):
+    new = copy.deepcopy(input_config)
+    new["services"][0]["rules"].reverse()
+    categorized = categorize_diff_records(diff_configs(input_config, new))
+    assert categorized["Reordered"]["rules"][0]["object"] == "RMS"
+
+
+def test_history_diff_reports_reorders(tmp_path, input_config):
+    history = ConfigHistory(str(tmp_path / "history"))
+    path = str(tmp_path / "input.yaml")
+    old = history.record(path, input_config)
+    new_config = copy.deepcopy(input_config)
+    new_config["services"].reverse()
+    new_config["services"][1]["rules"].reverse()
+    new = history.record(path, new_config)
+    records = changes(history.diff(old, new))
+    assert ("Reordered", "services", None, "order", ["RMS", "MMS"], ["MMS", "RMS"]) in records
+    assert ("Reordered", "rules", "RMS", "order", ["conditional-tool-id", "conditional-tool-type"], ["conditional-tool-type", "conditional-tool-id"]) in records
+    assert len(records) == 2
@@ -0,0 +1,62 @@
+import copy
+import os
+import shutil
+
+import pytest
+
+from config_history import ConfigHistory
+from config_validator import ConfigValidationError, load_yaml
+
+
+@pytest.fixture
+def setup(tmp_path):
+    history = ConfigHistory(str(tmp_path / "history"))
+    path = str(tmp_path / "input.yaml")
+    shutil.copy("config/input.yaml", path)
+    return history, path
+
+
+def test_rollback_keeps_unrecorded_edits_recoverable(setup):
+    history, path = setup
+    first = history.record_file(path, "Initial")
+    # Edited on disk, never recorded.
+    with open(path) as f:
+        text = f.read()
+    with open(path, "w") as f:
+        f.write(text.replace("weight: 20", "weight: 25").replace("weight: 80", "weight: 75"))
+    edited = load_yaml(path)
+
+    history.rollback(path, first)
+    assert load_yaml(path) == history.checkout(first)
+    messages = [entry.message for entry in history.revisions(path)]
+    assert messages[-2:] == ["Before rollback", f"Rollback to {first[:10]}"]
+
+    before = history.revisions(path)[-2].revision
+    assert history.checkout(before) == edited
+    history.rollback(path, before)
+    assert load_yaml(path) == edited
+
+
+def test_rollback_of_an_unparseable_file_keeps_a_raw_copy(setup, tmp_path):
+    history, path = setup
+    first = history.record_file(path)
+    with open(path, "w") as f:
+        f.write("services: [\n  half an edit")
+    history.rollback(path, first)
+    backups = os.listdir(tmp_path / "history" / "backups")
+    assert len(backups) == 1
+    with open(tmp_path / "history" / "backups" / backups[0]) as f:
+        assert f.read() == "services: [\n  half an edit"
+
+
+def test_failed_rollback_changes_nothing(setup):
+    history, path = setup
+    config = load_yaml(path)
+    broken = copy.deepcopy(config)
+    broken["services"][0]["default_upstream"] = "missing"
+    bad = history.record(path, broken)
+    count = len(history.revisions(path))
+    with pytest.raises(ConfigValidationError):
+        history.rollback(path, bad)
+    assert load_yaml(path) == config
+    assert len(history.revisions(path)) == count
@@ -0,0 +1,50 @@
+import hashlib
+import os
+import shutil
+
+import pytest
+
+import config_loader
+from config_loader import config_cache, load_and_validate_config, load_service
+from config_snapshot import open_snapshot, snapshot_path, write_snapshot
+from config_validator import ConfigValidationError, load_yaml, validator_fingerprint
+
+INVALID = "services: [{name: a, uri: /a/}]\n"
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(config_loader, "SNAPSHOTS_ENABLED", True)
+    path = tmp_path / "input.yaml"
+    shutil.copy("config/input.yaml", path)
+    config_cache.invalidate()
+    yield str(path)
+    config_cache.invalidate()
+
+
+def test_validated_config_is_snapshotted_and_reused(config_file):
+    config = load_and_validate_config(config_file)
+    snapshot = open_snapshot(config_file, validator=validator_fingerprint())
+    assert snapshot is not None
+    assert snapshot.load() == config
+    config_cache.invalidate()
+    assert load_and_validate_config(config_file) == config
+    assert load_service(config_file, "MMS") == config["services"][1]
+
+
+def test_snapshot_of_another_validator_is_not_trusted(config_file):
+    with open(config_file, "w") as f:
+        f.write(INVALID)
+    # An older validator accepted this file and left a snapshot behind.
+    digest = hashlib.sha256(INVALID.encode()).hexdigest()
+    assert write_snapshot(config_file, load_yaml(config_file), digest, validator="older-validator")
+    assert open_snapshot(config_file, digest=digest, validator=validator_fingerprint()) is None
+
+    with pytest.raises(ConfigValidationError):
+        load_and_validate_config(config_file)
+    with pytest.raises(ConfigValidationError):
+        load_service(config_file, "a")
+
+
+def test_snapshot_path_is_hidden(config_file):
+    assert os.path.basename(snapshot_path(config_file)) == ".input.yaml.snap"
@@ -0,0 +1,74 @@
+import pytest
+
+from config_validator import collect_issues, parse_yaml, service_digest
+
+SERVICE = "{name: a, uri: /a/, default_upstream: u, matches: [{id: m, header_name: X-A, operator: '==', value: v}], rules: [{id: r, matches: [m], upstream_id: u}], upstreams: [{id: u, target: t, port: 80}]}"
+
+
+def errors(document):
+    return [(issue.path, issue.message) for issue in collect_issues(parse_yaml(document)) if issue.severity == "error"]
+
+
+def test_input_config_is_valid(input_config):
+    assert [issue for issue in collect_issues(input_config) if issue.severity == "error"] == []
+
+
+def test_valid_service_has_no_errors():
+    assert errors(f"services: [{SERVICE}]") == []
+
+
+@pytest.mark.parametrize("document, path", [
+    ("services: [{name: [x], uri: /a/}]", ("services", 0, "name")),
+    ("services: [{name: {x: 1}, uri: /a/}, {name: {x: 1}, uri: /b/}]", ("services", 1, "name")),
+    (f"services: [{SERVICE.replace('uri: /a/', 'uri: [/a/]')}]", ("services", 0, "uri")),
+    (f"services: [{SERVICE.replace('header_name: X-A', 'header_name: [X-A]')}]", ("services", 0, "matches", 0, "header_name")),
+    (f"services: [{SERVICE.replace('{id: m,', '{id: [m],')}]", ("services", 0, "matches", 0, "id")),
+    (f"services: [{SERVICE.replace('{id: u,', '{id: {u: 1},')}]", ("services", 0, "upstreams", 0, "id")),
+    (f"services: [{SERVICE.replace('matches: [m]', 'matches: m')}]", ("services", 0, "rules", 0, "matches")),
+    (f"services: [{SERVICE.replace('matches: [m]', 'matches: [[m]]')}]", ("services", 0, "rules", 0, "matches")),
+    (f"services: [{SERVICE.replace('upstream_id: u', 'upstream_id: [u]')}]", ("services", 0, "rules", 0, "upstream_id")),
+    (f"services: [{SERVICE.replace('default_upstream: u', 'default_upstream: [u]')}]", ("services", 0, "default_upstream")),
+    (f"services: [{SERVICE[:-1]}, rollstrategy: {{groups: 5}}}}]", ("services", 0, "rollstrategy", "groups")),
+])
+def test_wrong_types_are_issues_not_exceptions(document, path):
+    assert path in [issue_path for issue_path, _ in errors(document)]
+
+
+MIXED_KEYS = SERVICE[:-1] + ", labels: {team: mms, 2024: q4}}"
+
+
+def test_mixed_key_mappings_are_valid():
+    assert errors(f"services: [{MIXED_KEYS}]") == []
+
+
+def test_mixed_key_digest_is_stable():
+    first = parse_yaml(f"services: [{MIXED_KEYS}]")["services"][0]
+    second = parse_yaml(f"services: [{MIXED_KEYS.replace('{team: mms, 2024: q4}', '{2024: q4, team: mms}')}]")["services"][0]
+    third = parse_yaml(f"services: [{MIXED_KEYS.replace('2024: q4', '2024: q3')}]")["services"][0]
+    assert service_digest(first) == service_digest(second)
+    assert service_digest(first) != service_digest(third)
+    # Same text, different key type.
+    assert service_digest({"a": {1: "x", "b": 2}}) != service_digest({"a": {"1": "x", "b": 2}})
+
+
+@pytest.mark.parametrize("rollstrategy", ["canary", "[1]", "5", "[]"])
+def test_rollstrategy_must_be_a_mapping(rollstrategy):
+    document = f"services: [{SERVICE[:-1]}, rollstrategy: {rollstrategy}}}]"
+    assert ("services", 0, "rollstrategy") in [path for path, _ in errors(document)]
+
+
+def test_null_and_empty_rollstrategy_are_valid():
+    assert errors(f"services: [{SERVICE[:-1]}, rollstrategy: null}}]") == []
+    assert errors(f"services: [{SERVICE[:-1]}, rollstrategy: {{}}}}]") == []
+
+
+@pytest.mark.parametrize("weights, bad", [((-10, 110), 0), ((50, "'50'"), 1), (("true", 100), 0)])
+def test_group_weights_must_be_non_negative_numbers(weights, bad):
+    groups = ", ".join(f"{{id: {chr(65 + index)}, upstream_id: u, weight: {weight}}}" for index, weight in enumerate(weights))
+    document = f"services: [{SERVICE[:-1]}, rollstrategy: {{groups: [{groups}]}}}}]"
+    assert ("services", 0, "rollstrategy", "groups", bad, "weight") in [path for path, _ in errors(document)]
+
+
+def test_valid_weights_pass():
+    groups = "{id: A, upstream_id: u, weight: 0}, {id: B, upstream_id: u, weight: 100}"
+    assert errors(f"services: [{SERVICE[:-1]}, rollstrategy: {{groups: [{groups}]}}}}]") == []
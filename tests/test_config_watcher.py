@@ -0,0 +1,41 @@
+import config_watcher
+from config_watcher import INVALID, VALID, ConfigStatusStore, ConfigWatcher
+
+
+def test_validation_crash_marks_source_invalid(tmp_path, monkeypatch):
+    (tmp_path / "good.yaml").write_text("services: []\n")
+    (tmp_path / "bad.yaml").write_text("services: []\n")
+    real = config_watcher.validate_source
+
+    def validate_source(directory, source):
+        if source == "bad.yaml":
+            raise TypeError("unhashable type: 'list'")
+        return real(directory, source)
+
+    monkeypatch.setattr(config_watcher, "validate_source", validate_source)
+    store = ConfigStatusStore()
+    watcher = ConfigWatcher(str(tmp_path), store)
+    watcher._pending = set(watcher.sources())
+    watcher._flush()
+
+    bad = store.get("bad.yaml")
+    assert bad.state == INVALID
+    assert bad.errors == 1
+    assert "TypeError" in bad.issues[0].message
+    assert store.get("good.yaml").state == VALID
+
+
+def test_watcher_survives_unhashable_service_name(tmp_path):
+    (tmp_path / "odd.yaml").write_text("services: [{name: [x], uri: /a/}]\n")
+    store = ConfigStatusStore()
+    watcher = ConfigWatcher(str(tmp_path), store, debounce=0, poll_interval=0.05).start()
+    try:
+        for _ in range(100):
+            status = store.get("odd.yaml")
+            if status is not None and status.checked_at is not None:
+                break
+            watcher._stop.wait(0.05)
+        assert store.get("odd.yaml").state == INVALID
+        assert watcher._thread.is_alive()
+    finally:
+        watcher.stop()
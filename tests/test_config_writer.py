@@ -0,0 +1,58 @@
+from config_validator import load_yaml
+from config_writer import save_service
+
+COMMENTED = """# Dispatcher services
+services:
+  - name: RMS
+    admin_state: enabled
+    uri: /rms/
+    default_upstream: rms-blue
+    matches: []
+    rules: []
+    upstreams:
+      - id: rms-blue
+        target: rms-blue.k8s.svc.cluster.local
+        port: 80
+    rollstrategy: null
+
+  # MMS team owns this, do not touch
+  - name: MMS
+    admin_state: enabled
+    uri: /mms/
+    default_upstream: mms-blue
+    matches: []
+    rules: []
+    upstreams:
+      - id: mms-blue
+        target: mms-blue.k8s.svc.cluster.local
+        port: 80
+    rollstrategy: null  # trailing comment
+# end of services
+"""
+
+
+def save(tmp_path, text, index, update):
+    path = tmp_path / "input.yaml"
+    path.write_text(text)
+    original = load_yaml(str(path))["services"][index]
+    service = {**original, **update}
+    save_service(str(path), service, original)
+    return path.read_text()
+
+
+def test_comments_and_blank_lines_around_the_service_are_kept(tmp_path):
+    saved = save(tmp_path, COMMENTED, 0, {"admin_state": "disabled"})
+    assert saved == COMMENTED.replace("admin_state: enabled", "admin_state: disabled", 1)
+
+
+def test_comment_on_the_last_line_is_kept(tmp_path):
+    saved = save(tmp_path, COMMENTED, 1, {"uri": "/mms2/"})
+    assert saved == COMMENTED.replace("uri: /mms/", "uri: /mms2/")
+
+
+def test_block_scalar_at_the_end_keeps_following_lines(tmp_path):
+    text = COMMENTED.replace("    rollstrategy: null\n\n", "    note: |\n      keep me\n\n    # after note\n")
+    saved = save(tmp_path, text, 0, {"uri": "/rms2/"})
+    tail = text[text.index("\n\n    # after note"):]
+    assert saved.endswith(tail)
+    assert load_yaml(str(tmp_path / "input.yaml"))["services"][0]["note"] == "keep me\n"
@@ -0,0 +1,89 @@
+import random
+import re
+
+import pytest
+
+from regex_matcher import RegexMatchSet, regex_risk
+
+
+@pytest.mark.parametrize("pattern", [
+    r"(a+)+",
+    r"(.*,)*",
+    r"^(\w+\s?)*$",
+    r"(a|a)*",
+    r"^(a|aa)+$",
+    r"(ab|abc)*",
+    r"(x|xy|z)+",
+    r"(?:foo|)+",
+    r"(\d+\.?)+",
+    r"(?i)(A+a)+",
+    r"((a+){2})+",
+    r"(a|b+)+",
+    r"(a+){1,100}",
+])
+def test_risky_patterns(pattern):
+    assert regex_risk(pattern)
+
+
+@pytest.mark.parametrize("pattern", [
+    r"^type.*",
+    r"^special.*",
+    r"tool\d+",
+    r"(?:x|y)+",
+    r"(ab|cd)+",
+    r"a|aa",
+    r"^(a|b)*c$",
+    r"(",
+    # Small fixed repeats do not loop.
+    r"^v(\d+\.){2}\d+$",
+    r"(a+){2}",
+    # The inner repeat cannot match the character that delimits it.
+    r"^(\d+\.)+\d+$",
+    r"^([a-z0-9]+-)*[a-z0-9]+$",
+    r"^type(-\w+)*$",
+    r"(a+b+)+",
+    r"((\d+\.)+x)+",
+])
+def test_safe_patterns(pattern):
+    assert regex_risk(pattern) is None
+
+
+PATTERNS = [
+    r"^type.*",
+    r"^special",
+    r"tool\d{3}$",
+    r"(?i)^TOOL",
+    r"ab|cd",
+    r"^(x)\1",
+    r"(?P<n>a)b",
+    r"\$",
+    r"^$",
+    r"b$",
+    r"^a(b|c)+d",
+]
+VALUES = ["", "type", "typeX", "special-1", "tool123", "TOOL9", "xtool456", "abcd", "xx", "xxb", "$5", "abcbd", "b"]
+
+
+def expected(patterns, value):
+    return [index for index, pattern in enumerate(patterns) if re.search(pattern, value)]
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_match_set_agrees_with_sequential_search(value):
+    match_set = RegexMatchSet(enumerate(PATTERNS))
+    hits = expected(PATTERNS, value)
+    assert match_set.matches(value) == hits
+    assert match_set.first_match(value) == (hits[0] if hits else None)
+
+
+def test_match_set_agrees_on_random_subsets():
+    rng = random.Random(7)
+    alphabet = "abcdxty$15T"
+    for _ in range(300):
+        patterns = rng.sample(PATTERNS, rng.randint(1, len(PATTERNS)))
+        match_set = RegexMatchSet(enumerate(patterns))
+        for _ in range(5):
+            value = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 8)))
+            hits = expected(patterns, value)
+            assert match_set.matches(value) == hits, (patterns, value)
+            assert match_set.first_match(value) == (hits[0] if hits else None), (patterns, value)
@@ -0,0 +1,137 @@
+import copy
+from collections import Counter
+
+import pytest
+
+from rollout import BUCKETS, allocate_buckets, bucket_quotas, sticky_bucket
+from routing import RouteDecision, compile_config
+
+
+@pytest.fixture
+def table(input_config):
+    return compile_config(input_config)
+
+
+@pytest.mark.parametrize("uri, headers, expected", [
+    ("/rms/api", {"X-Tool-Id": "tool123"}, RouteDecision("RMS", "conditional-tool-id", "rms-green")),
+    ("/rms/api", {"x-tool-id": "tool456"}, RouteDecision("RMS", "conditional-tool-id", "rms-green")),
+    ("/rms/api", {"X-Tool-Type": "typeA"}, RouteDecision("RMS", "conditional-tool-type", "rms-green")),
+    # Both rules hit; the first one in file order wins.
+    ("/rms/api", {"X-Tool-Id": "tool123", "X-Tool-Type": "typeA"}, RouteDecision("RMS", "conditional-tool-id", "rms-green")),
+    # ~= is a search, so ^ anchors the header value, not the URI.
+    ("/rms/api", {"X-Tool-Type": "mytype"}, None),
+    ("/mms/api", {"X-Tool-Id": "tool789"}, RouteDecision("MMS", "conditional-tool-id", "mms-green")),
+    ("/mms/api", {"X-Tool-Type": "special-x"}, RouteDecision("MMS", "conditional-tool-type", "mms-green")),
+    ("/mms/api", {"X-Tool-Id": "tool123"}, RouteDecision("MMS", None, "mms-blue")),
+    ("/mms/api", {}, RouteDecision("MMS", None, "mms-blue")),
+])
+def test_rule_decisions(table, uri, headers, expected):
+    decision = table.route(uri, headers)
+    if expected is None:
+        assert decision.service == "RMS" and decision.rule is None and decision.group in ("A", "B")
+    else:
+        assert decision == expected
+
+
+def test_unmatched_requests_follow_the_rollstrategy(table):
+    decisions = {bucket: table.route("/rms/x", {"X-Tool-Id": "other"}, bucket) for bucket in range(BUCKETS)}
+    groups = Counter(decision.group for decision in decisions.values())
+    assert groups == {"A": 20, "B": 80}
+    assert all(decision.upstream == ("rms-green" if decision.group == "A" else "rms-blue") for decision in decisions.values())
+
+
+def test_sticky_header_keeps_a_tool_on_one_group(table):
+    first = table.route("/rms/x", {"X-Tool-Id": "tool-42"})
+    assert all(table.route("/rms/y", {"x-tool-id": "tool-42"}) == first for _ in range(20))
+    assert first.group == ("A" if sticky_bucket("tool-42") < 20 else "B")
+
+
+@pytest.mark.parametrize("uri, service", [
+    ("/rms", "RMS"),
+    ("/rms/", "RMS"),
+    ("/rms/a/b/c", "RMS"),
+    ("//rms//a", "RMS"),
+    ("/rms?debug=1", "RMS"),
+    ("/rmsx", None),
+    ("/rmsx/a", None),
+    ("/", None),
+    ("", None),
+    ("/api/rms", None),
+])
+def test_prefix_matching(table, uri, service):
+    found = table.find_service(uri)
+    assert (found.name if found is not None else None) == service
+
+
+def test_longest_prefix_wins(input_config):
+    nested = copy.deepcopy(input_config["services"][1])
+    nested["name"] = "MMS-V2"
+    nested["uri"] = "/mms/v2/"
+    input_config["services"].append(nested)
+    table = compile_config(input_config)
+    assert table.find_service("/mms/v2/items").name == "MMS-V2"
+    assert table.find_service("/mms/v2").name == "MMS-V2"
+    assert table.find_service("/mms/v20").name == "MMS"
+    assert table.find_service("/mms/v1/items").name == "MMS"
+
+
+def test_root_service_catches_everything_else(input_config):
+    root = copy.deepcopy(input_config["services"][1])
+    root["name"] = "ROOT"
+    root["uri"] = "/"
+    input_config["services"].append(root)
+    table = compile_config(input_config)
+    assert table.find_service("/other").name == "ROOT"
+    assert table.find_service("/rms/a").name == "RMS"
+
+
+def test_disabled_services_are_not_routed(input_config):
+    input_config["services"][0]["admin_state"] = "disabled"
+    assert compile_config(input_config).route("/rms/a") is None
+
+
+@pytest.mark.parametrize("weights", [[20, 80], [1, 1, 1], [33, 33, 34], [0, 100], [7, 0, 93]])
+def test_quotas_fill_every_bucket(weights):
+    quotas = bucket_quotas(weights)
+    assert sum(quotas) == BUCKETS
+    assert all(abs(quota - weight * BUCKETS / sum(weights)) < 1 for quota, weight in zip(quotas, weights))
+
+
+def moved(before, after, group_ids):
+    return sum(1 for old, new in zip(before, after) if group_ids[old] != group_ids[new])
+
+
+@pytest.mark.parametrize("old_weights, new_weights", [
+    ([20, 80], [30, 70]),
+    ([20, 80], [80, 20]),
+    ([50, 50], [50, 50]),
+    ([10, 20, 70], [40, 20, 40]),
+    ([1, 1, 1], [1, 2, 1]),
+])
+def test_weight_change_moves_as_few_buckets_as_possible(old_weights, new_weights):
+    group_ids = [chr(65 + index) for index in range(len(old_weights))]
+    before = allocate_buckets(group_ids, old_weights)
+    after = allocate_buckets(group_ids, new_weights, previous=tuple(group_ids[index] for index in before))
+    old_quotas, new_quotas = bucket_quotas(old_weights), bucket_quotas(new_weights)
+    # Only buckets of groups that shrank have to move, and only as many as they lost.
+    minimum = sum(max(0, old - new) for old, new in zip(old_quotas, new_quotas))
+    assert moved(before, after, group_ids) == minimum
+    assert Counter(after) == {index: quota for index, quota in enumerate(new_quotas) if quota}
+
+
+def test_removed_group_hands_over_only_its_buckets():
+    before = allocate_buckets(["A", "B", "C"], [30, 30, 40])
+    previous = tuple("ABC"[index] for index in before)
+    after = allocate_buckets(["A", "C"], [50, 50], previous)
+    kept = sum(1 for bucket in range(BUCKETS) if previous[bucket] != "B" and "AC"[after[bucket]] == previous[bucket])
+    assert kept == 70
+
+
+def test_recompiling_with_previous_table_keeps_sticky_keys(input_config):
+    old_table = compile_config(input_config)
+    groups = input_config["services"][0]["rollstrategy"]["groups"]
+    groups[0]["weight"], groups[1]["weight"] = 30, 70
+    new_table = compile_config(input_config, previous=old_table)
+    changed = [bucket for bucket in range(BUCKETS) if old_table.route("/rms/x", bucket=bucket) != new_table.route("/rms/x", bucket=bucket)]
+    assert len(changed) == 10
+    assert all(old_table.route("/rms/x", bucket=bucket).group == "B" for bucket in changed)
@@ -0,0 +1,70 @@
+from config_validator import collect_issues, parse_yaml
+from rule_analysis import analyze_rules
+
+
+def service(matches, rules):
+    return {
+        "name": "svc",
+        "matches": [{"id": match_id, "header_name": header, "operator": operator, "value": value} for match_id, header, operator, value in matches],
+        "rules": [{"id": rule_id, "matches": match_ids, "upstream_id": upstream} for rule_id, match_ids, upstream in rules],
+    }
+
+
+SHADOWED_MATCHES = [("prefix", "X-Tool-Type", "~=", "^type"), ("exact", "x-tool-type", "==", "type-a")]
+
+SHADOWED = service(
+    SHADOWED_MATCHES,
+    [("broad", ["prefix"], "green"), ("narrow", ["exact"], "blue")],
+)
+
+
+def test_rule_fully_shadowed_by_earlier_prefix():
+    assert analyze_rules(SHADOWED) == [
+        (("rules", 1), "Rule 'narrow' in service svc is unreachable: all its matches are taken by earlier rule(s) 'broad'", "warning"),
+    ]
+
+
+def test_partly_shadowed_rule_reports_the_lost_match():
+    partial = service(
+        SHADOWED_MATCHES + [("other", "X-Tool-Id", "==", "tool1")],
+        [("broad", ["prefix"], "green"), ("narrow", ["exact", "other"], "blue")],
+    )
+    assert [(path, severity) for path, _, severity in analyze_rules(partial)] == [(("rules", 1, "matches"), "warning")]
+
+
+def test_non_overlapping_rules_are_clean():
+    clean = service(
+        [("prefix", "X-Tool-Type", "~=", "^type"), ("exact", "X-Tool-Type", "==", "special-a"), ("tool", "X-Tool-Id", "==", "type-a")],
+        [("broad", ["prefix"], "green"), ("narrow", ["exact"], "blue"), ("by-id", ["tool"], "blue")],
+    )
+    assert analyze_rules(clean) == []
+
+
+def test_later_regex_is_not_shadowed_by_earlier_exact_value():
+    reversed_order = service(
+        [("exact", "X-Tool-Type", "==", "type-a"), ("prefix", "X-Tool-Type", "~=", "^type")],
+        [("narrow", ["exact"], "blue"), ("broad", ["prefix"], "green")],
+    )
+    assert analyze_rules(reversed_order) == []
+
+
+def test_findings_are_warnings_and_keep_the_config_valid():
+    document = """
+services:
+  - name: svc
+    uri: /svc/
+    default_upstream: u
+    matches:
+      - {id: prefix, header_name: X-Tool-Type, operator: "~=", value: "^type"}
+      - {id: exact, header_name: X-Tool-Type, operator: "==", value: type-a}
+      - {id: unused, header_name: X-Tool-Id, operator: "==", value: tool1}
+    rules:
+      - {id: broad, matches: [prefix], upstream_id: u}
+      - {id: narrow, matches: [exact], upstream_id: u}
+    upstreams:
+      - {id: u, target: t, port: 80}
+"""
+    issues = collect_issues(parse_yaml(document))
+    assert issues
+    assert {issue.severity for issue in issues} == {"warning"}
+    assert {issue.path for issue in issues} == {("services", 0, "rules", 1), ("services", 0, "matches", 2)}
@@ -0,0 +1,28 @@
+import copy
+import os
+
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("pandas")
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from config_validator import load_yaml  # noqa: E402
+from conftest import INPUT_CONFIG, ROOT  # noqa: E402
+
+
+def test_pending_edits_survive_switching_services():
+    app = AppTest.from_file(os.path.join(ROOT, "view_services.py"), default_timeout=30).run()
+    assert not app.exception
+    matches = load_yaml(INPUT_CONFIG)["services"][0]["matches"]
+    edited = copy.deepcopy(matches)
+    edited[0]["value"] = "tool999"
+
+    app.selectbox[0].select("MMS").run()
+    # Edits made in the RMS grid before switching are only kept as pending rows;
+    # the grid widget itself was dropped while MMS was shown.
+    app.session_state["service_editor"]["RMS"]["pages"][("matches", 1)] = edited
+    app.selectbox[0].select("RMS").run()
+    assert not app.exception
+    assert app.session_state["service_editor"]["RMS"]["pages"][("matches", 1)] == edited
+    assert any("Unsaved changes in: matches" in warning.value for warning in app.warning)
@@ -1,17 +1,15 @@
 import os
 import yaml
 import streamlit as st # type: ignore
-from config_loader import load_and_validate_config, ConfigValidationError
-
-def list_yaml_files(directory):
-    """List all YAML files in a given directory."""
-    return [f for f in os.listdir(directory) if f.endswith('.yaml')]
+from config_loader import CONFIG_DIRECTORY, list_config_sources, load_and_validate_config, ConfigValidationError
+from config_validator import format_issue
+from config_watcher import INVALID, STALE, start_watcher
 
 def validation_page():
     st.title("Configuration Validation")
 
-    config_directory = "./config"
-    yaml_files = list_yaml_files(config_directory)
+    config_directory = CONFIG_DIRECTORY
+    yaml_files = list_config_sources(config_directory)
 
     if not yaml_files:
         st.error("No YAML files found in the /config directory.")
@@ -21,6 +19,18 @@ def validation_page():
     st.header("Select Configuration File")
     selected_file = st.selectbox("Choose a file to validate:", yaml_files)
 
+    # Latest result of the background watcher, available without parsing anything here.
+    status = start_watcher().store.get(selected_file)
+    if status is None:
+        st.info("Not checked by the config watcher yet.")
+    elif status.state == STALE:
+        st.warning("Changed on disk; revalidation in progress.")
+    elif status.state == INVALID:
+        st.error(f"Watcher: invalid ({status.errors} errors, {status.warnings} warnings).")
+        st.code("\n".join(format_issue(issue) for issue in status.issues))
+    else:
+        st.success(f"Watcher: valid ({status.warnings} warnings).")
+
     if st.button("Validate Configuration"):
         file_path = os.path.join(config_directory, selected_file)
 
@@ -0,0 +1,49 @@
+import tracemalloc
+import streamlit as st # type: ignore
+from perf_metrics import METRICS_FILE, max_rss_bytes, registry
+
+def render_metrics_table():
+    rows = registry.snapshot()
+    if not rows:
+        st.info("No metrics recorded yet. Open the other pages to collect timings.")
+        return
+
+    for row in rows:
+        for column in ("total_seconds", "mean_seconds", "max_seconds", "last_seconds"):
+            row[column.replace("_seconds", "_ms")] = row.pop(column) * 1000
+    st.dataframe(rows, use_container_width=True)
+
+def performance_page():
+    st.title("Performance")
+    st.caption("Timings recorded in this server process since start-up or the last reset.")
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Peak RSS", f"{max_rss_bytes() / 1e6:.1f} MB")
+    col2.metric("Instrumented operations", len(registry.snapshot()))
+    tracing = col3.toggle("Track allocations (tracemalloc)", value=tracemalloc.is_tracing(),
+                          help="Records net bytes allocated per call. Slows everything down while enabled.")
+    if tracing and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not tracing and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+    render_metrics_table()
+
+    st.header("Prometheus Export")
+    text = registry.prometheus_text()
+    export_path = st.text_input("Text file path", METRICS_FILE or "metrics/dispatcher.prom")
+    col1, col2, col3 = st.columns(3)
+    if col1.button("Write File"):
+        try:
+            registry.write_prometheus(export_path)
+            st.success(f"Metrics written to {export_path}")
+        except OSError as e:
+            st.error(f"Could not write metrics: {e}")
+    col2.download_button("Download", text, file_name="dispatcher.prom", mime="text/plain")
+    if col3.button("Reset Metrics"):
+        registry.reset()
+        st.rerun()
+    with st.expander("Preview"):
+        st.code(text, language="text")
+
+performance_page()
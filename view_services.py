@@ -1,7 +1,23 @@
+import math
+import numbers
 import streamlit as st # type: ignore
 import yaml
 import pandas as pd
-from config_loader import load_and_validate_config
+from config_history import history
+from config_loader import DEFAULT_CONFIG_FILE, load_service, load_service_names, service_source_file
+from config_validator import ConfigValidationError, check_service, format_path
+from config_writer import save_service
+
+# Rows shown per page in the grid editors; only the visible page is sent to
+# the browser, so reruns stay fast however many matches a service has.
+EDITOR_PAGE_SIZE = 50
+
+# Editable service sections and the grid columns shown for each.
+SECTION_FIELDS = {
+    "matches": ["id", "header_name", "operator", "value"],
+    "rules": ["id", "matches", "upstream_id"],
+    "upstreams": ["id", "target", "port", "version"],
+}
 
 
 def render_navigation():
@@ -36,62 +52,202 @@ def display_service_summary(service):
     st.write(f"- **Total Upstreams:** {len(service.get('upstreams', []))}")
     st.write(f"- **Total Rules:** {len(service.get('rules', []))}")
 
-def render_service_config(config):
+def _clean(value):
+    """Normalize empty grid cells (None, NaN, blank strings) to None."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, str) and not value.strip():
+        return None
+    return value
+
+def to_grid_row(section, item):
+    """Convert a match/rule/upstream into a grid row."""
+    row = {field: _clean(item.get(field)) for field in SECTION_FIELDS[section]}
+    if section == "rules":
+        row["matches"] = ", ".join(str(m) for m in item.get("matches") or [])
+    elif section == "matches" and row["value"] is not None:
+        row["value"] = str(row["value"])
+    return row
+
+def from_grid_row(section, row, base=None):
+    """Convert a grid row back into a config object, keeping fields the grid does not show."""
+    item = dict(base or {})
+    for field in SECTION_FIELDS[section]:
+        value = _clean(row.get(field))
+        if value is None:
+            item.pop(field, None)
+        elif section == "rules" and field == "matches":
+            item[field] = [m.strip() for m in str(value).split(",") if m.strip()]
+        elif section == "upstreams" and field == "port":
+            item[field] = int(value)
+        else:
+            item[field] = value
+    return item
+
+def editor_state(service_name):
+    """Return the pending edits of a service, kept in session state across reruns."""
+    editors = st.session_state.setdefault("service_editor", {})
+    return editors.setdefault(service_name, {"pages": {}, "seeds": {}, "shown": {}, "version": 0})
+
+def pending_items(items, state, section):
+    """Apply the edited pages of a section to its original items."""
+    result = list(items)
+    # Pages are replaced from the last one down so earlier offsets stay valid.
+    for (edited_section, page), rows in sorted(state["pages"].items(), reverse=True):
+        if edited_section == section:
+            start = (page - 1) * EDITOR_PAGE_SIZE
+            result[start:start + EDITOR_PAGE_SIZE] = rows
+    return result
+
+def pending_service(service, state):
+    """Return the service with all pending grid edits applied."""
+    return {**service, **{section: pending_items(service.get(section, []), state, section) for section in SECTION_FIELDS}}
+
+def render_section_editor(service_name, section, items, column_config=None):
+    """Render one page of a section as an editable grid and record the edits."""
+    state = editor_state(service_name)
+    page_count = max(1, math.ceil(len(items) / EDITOR_PAGE_SIZE))
+    page = 1
+    if page_count > 1:
+        page = int(st.number_input(f"Page (1-{page_count})", min_value=1, max_value=page_count, key=f"{service_name}-{section}-page"))
+    start = (page - 1) * EDITOR_PAGE_SIZE
+    original = items[start:start + EDITOR_PAGE_SIZE]
+
+    # A grid keeps its own edits relative to the data it was created with, and
+    # Streamlit drops them once a run does not render it (another grid page,
+    # another service or another app page). Pin that data per widget version
+    # and start a new version, seeded with the pending rows, whenever the
+    # previous run did not render this grid.
+    page_key = (section, page)
+    seed = state["seeds"].get(page_key)
+    rendered = seed is not None and f"{service_name}-{section}-{seed[0]}" in st.session_state
+    if not rendered or state["shown"].get(section) != page:
+        state["version"] += 1
+        seed = (state["version"], state["pages"].get(page_key, original))
+        state["seeds"][page_key] = seed
+        state["shown"][section] = page
+    version, baseline = seed
+
+    edited = st.data_editor(
+        pd.DataFrame([to_grid_row(section, item) for item in baseline], columns=SECTION_FIELDS[section]),
+        num_rows="dynamic",
+        column_config=column_config,
+        hide_index=True,
+        use_container_width=True,
+        key=f"{service_name}-{section}-{version}",
+    )
+
+    rows = []
+    for label, row in zip(edited.index, edited.to_dict("records")):
+        base = baseline[int(label)] if isinstance(label, numbers.Integral) and label < len(baseline) else None
+        cleaned = {field: _clean(value) for field, value in row.items()}
+        if base is not None and cleaned == to_grid_row(section, base):
+            rows.append(base)
+        elif any(value is not None for value in cleaned.values()):
+            rows.append(from_grid_row(section, cleaned, base))
+    if rows != original:
+        state["pages"][page_key] = rows
+    else:
+        state["pages"].pop(page_key, None)
+
+def render_save_bar(config_file, service, edited):
+    """Show pending changes with their validation result and save them atomically."""
+    if edited == service:
+        st.caption("No unsaved changes.")
+        return
+
+    changed = [section for section in SECTION_FIELDS if edited.get(section) != service.get(section)]
+    st.warning(f"Unsaved changes in: {', '.join(changed)}")
+    issues = check_service(edited)
+    errors = [message for _, message, severity in issues if severity == "error"]
+    for message in errors:
+        st.error(message)
+
+    col1, col2 = st.columns(2)
+    if col1.button("Save Changes", type="primary", disabled=bool(errors)):
+        # Split config directories: write to the file that defines the service.
+        source_file = service_source_file(config_file, service["name"]) or config_file
+        try:
+            history.record_file(source_file, "Before editing")
+            config = save_service(source_file, edited, original=service)
+        except ConfigValidationError as e:
+            st.error(f"Save failed: {e}")
+            return
+        history.record(source_file, config, f"Edit service {service['name']}")
+        st.session_state["service_editor"].pop(service["name"], None)
+        st.session_state["service_editor_flash"] = f"Service {service['name']} saved to {source_file}."
+        st.rerun()
+    if col2.button("Discard Changes"):
+        st.session_state["service_editor"].pop(service["name"], None)
+        st.rerun()
+
+def render_service_config(config_file):
     st.title("Service Configuration")
 
-    service_names = [s["name"] for s in config.get("services", [])]
+    flash = st.session_state.pop("service_editor_flash", None)
+    if flash:
+        st.success(flash)
+
+    service_names = load_service_names(config_file)
     selected_service = st.selectbox("Select Service", service_names)
 
-    service = next((s for s in config["services"] if s["name"] == selected_service), None)
+    service = load_service(config_file, selected_service)
     if service:
-        tab1, tab2, tab3, tab4, tab5 = st.tabs(["Overview", "Matches", "Upstreams", "Rollout Strategy", "Selected Configuration"])
+        state = editor_state(service["name"])
+        tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["Overview", "Matches", "Rules", "Upstreams", "Rollout Strategy", "Selected Configuration"])
+
+        with tab2:
+            st.header("Matches")
+            render_section_editor(service["name"], "matches", service.get("matches", []), {
+                "operator": st.column_config.SelectboxColumn("operator", options=["==", "~="], required=True),
+            })
+
+        with tab4:
+            st.header("Upstreams")
+            render_section_editor(service["name"], "upstreams", service.get("upstreams", []), {
+                "port": st.column_config.NumberColumn("port", min_value=1, max_value=65535, step=1, required=True),
+            })
+
+        with tab3:
+            st.header("Rules")
+            st.caption("List match IDs separated by commas. A rule applies when any of its matches hits.")
+            upstream_ids = [u.get("id") for u in pending_items(service.get("upstreams", []), state, "upstreams")]
+            render_section_editor(service["name"], "rules", service.get("rules", []), {
+                "upstream_id": st.column_config.SelectboxColumn("upstream_id", options=upstream_ids, required=True),
+            })
+
+        # Everything below reflects the pending edits.
+        edited = pending_service(service, state)
 
         with tab1:
             st.header("Service Overview")
-            display_service_summary(service)
+            display_service_summary(edited)
 
             st.header("Rules")
             rows = []
-            for rule in service.get("rules", []):
-                matches = ", ".join(rule.get("matches", []))
+            for rule in edited.get("rules") or []:
+                if not isinstance(rule, dict):
+                    continue
+                matches = ", ".join(str(match_id) for match_id in rule.get("matches") or [])
                 rows.append({
-                    "Rule ID": rule["id"],
+                    "Rule ID": rule.get("id", ""),
                     "Matches": matches,
-                    "Upstream": rule.get("upstream_id", service.get('default_upstream', ''))
+                    "Upstream": rule.get("upstream_id", edited.get('default_upstream', ''))
                 })
             if rows:
-                st.dataframe(pd.DataFrame(rows))
+                st.dataframe(rows)
             else:
                 st.write("No rules defined.")
 
-        with tab2:
-            st.header("Matches")
-
-            # Editable matches table
-            matches = service.get("matches", [])
-            if matches:
-                for i, match in enumerate(matches):
-                    st.markdown(f"#### Match {i+1}")
-                    match["header_name"] = st.text_input(f"Header Name ({i+1})", match["header_name"], key=f"header_name_{i}")
-                    match["operator"] = st.selectbox(f"Operator ({i+1})", ["==", "~="], index=["==", "~="].index(match["operator"]), key=f"operator_{i}")
-                    match["value"] = st.text_input(f"Value ({i+1})", match["value"], key=f"value_{i}")
-
-                if st.button("Save Matches"):
-                    config_file = "input.yaml"
-                    save_config(config_file, config)
-                    st.success("Matches updated successfully!")
-            else:
-                st.write("No matches defined.")
-
-        with tab3:
-            st.header("Upstreams")
-            df_upstreams = pd.DataFrame(service.get("upstreams", []))
-            if not df_upstreams.empty:
-                st.dataframe(df_upstreams)
+            st.header("Rule Analysis")
+            warnings = [(path, message) for path, message, severity in check_service(edited) if severity == "warning"]
+            if warnings:
+                for path, message in warnings:
+                    st.warning(f"`{format_path(path)}`: {message}")
             else:
-                st.write("No upstreams defined.")
+                st.success("No shadowed rules, conflicting overlaps, duplicate or unused matches.")
 
-        with tab4:
+        with tab5:
             st.header("Rollout Strategy")
             rollstrategy = service.get("rollstrategy", None)
             if rollstrategy:
@@ -110,17 +266,19 @@ def render_service_config(config):
             else:
                 st.write("No rollout strategy configured. Using default upstream.")
 
-        with tab5:
+        with tab6:
             st.header("Selected Service Configuration")
-            st.code(yaml.dump(service, default_flow_style=False), language="yaml")
+            st.code(yaml.dump(edited, default_flow_style=False), language="yaml")
+
+        st.divider()
+        render_save_bar(config_file, service, edited)
 
 
 st.set_page_config(page_title="Service Configuration", layout="wide")
-config_file = "config/input.yaml"
+config_file = DEFAULT_CONFIG_FILE
 # Validate and display the config
 try:
-    config = load_and_validate_config(config_file)
-    render_service_config(config)
+    render_service_config(config_file)
 except Exception as e:
      st.error(e)
      st.stop()  # Stop execution if the config is invalid
\ No newline at end of file